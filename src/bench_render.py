@@ -0,0 +1,155 @@
+"""
+Headless rendering benchmark, on SDL's dummy video driver.
+Scenarios:
+    full: display.overall_display on the starting board, the cached board
+          layer being rebuilt every frame (worst case, every pixel drawn)
+    midgame: the Renderer of game.main on a mid-game board, a move being
+          played every 10 frames (layer updates and dirty rectangles)
+    drag: scripted drag of a marble around its neighbours, following the
+          calls of game.main (hit test, push_marble, Renderer with drag)
+Frames/second and the cost of every display function (see profiler.py) are
+reported per scenario. A frame rate below --min-fps makes the script exit
+with status 1.
+
+Usage:
+    python src/bench_render.py
+    python src/bench_render.py --scenario drag --frames 5000 --min-fps 500
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+from time import perf_counter
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame as pg
+
+import constants as const
+import display as dsp
+import rules
+from board import Board
+from profiler import Profiler
+
+MIDGAME_PLIES = 40 # Random plies played before the mid-game scenarios
+
+
+def midgame_board(seed) -> Board:
+    """Returns a board after MIDGAME_PLIES random moves (ejections first)."""
+    rng = random.Random(seed)
+    board = Board(seed=seed)
+    for _ in range(MIDGAME_PLIES):
+        moves = list(board.legal_moves())
+        ejections = [m for m in moves if m.ejected]
+        board.play(rng.choice(ejections or moves))
+    return board
+
+def full(screen, frames, profiler, seed) -> None:
+    """Full redraws of the starting board."""
+    board = Board(seed=seed)
+    for _ in range(frames):
+        board.version += 1 # Rebuilds the board layer
+        profiler.start("draw")
+        dsp.overall_display(screen, board, False, False)
+        profiler.stop("draw")
+        profiler.start("display update")
+        pg.display.flip()
+        profiler.stop("display update")
+        profiler.end_frame()
+
+def midgame(screen, frames, profiler, seed) -> None:
+    """Incremental redraws of a mid-game board, a move every 10 frames."""
+    rng = random.Random(seed)
+    board = midgame_board(seed)
+    renderer = dsp.Renderer(board)
+    for frame in range(frames):
+        if frame % 10 == 9 and not board.check_win():
+            board.play(rng.choice(list(board.legal_moves())))
+        profiler.start("draw")
+        dirty = renderer.draw(screen, board, board.check_win(), False)
+        profiler.stop("draw")
+        profiler.start("display update")
+        pg.display.update(dirty)
+        profiler.stop("display update")
+        profiler.end_frame()
+
+def drag(screen, frames, profiler, seed) -> None:
+    """Drags a marble on a circle around its spot, as game.main does."""
+    board = midgame_board(seed)
+    renderer = dsp.Renderer(board)
+    pick = next(loc for loc in rules.CELLS if board.get_value(loc) == board.current_color)
+    center = board.get_center(pick)
+    moving_marble = const.MARBLE_IMGS[board.get_value(pick)].get_rect(center=center)
+    hover, valid_move = None, False
+    for frame in range(frames):
+        profiler.start("events")
+        angle = 2 * math.pi * frame / 120
+        mouse = (int(center[0] + 1.2 * const.MARBLE_SIZE * math.cos(angle)),
+                 int(center[1] + 1.2 * const.MARBLE_SIZE * math.sin(angle)))
+        moving_marble.center = mouse
+        target = board.normalize_coordinates(mouse)
+        if target != hover:
+            hover = target
+            valid_move = False
+            if target and rules.direction(rules.INDEX[pick], rules.INDEX[target]) is not None:
+                valid_move = board.push_marble(pick, target)
+        profiler.stop("events")
+        profiler.start("draw")
+        dirty = renderer.draw(screen, board, False, valid_move, (pick, moving_marble))
+        profiler.stop("draw")
+        profiler.start("display update")
+        pg.display.update(dirty)
+        profiler.stop("display update")
+        profiler.end_frame()
+
+SCENARIOS = {"full": full, "midgame": midgame, "drag": drag}
+
+
+def run(name, frames, seed=0) -> tuple:
+    """
+    Runs a scenario.
+
+    Returns
+    -------
+    tuple:
+        (frames per second, Profiler with the timings of every frame)
+    """
+    screen = pg.display.set_mode([const.WIDTH, const.HEIGHT])
+    const.load_assets()
+    dsp.LAYER.update(key=None, surface=None)
+    profiler = Profiler()
+    profiler.instrument(dsp)
+    profiler.instrument(dsp.Renderer, ["layer_changes", "build_scene"])
+    profiler.instrument(Board, ["push_marble", "new_range", "get_move_index"])
+    start = perf_counter()
+    try:
+        SCENARIOS[name](screen, frames, profiler, seed)
+    finally:
+        profiler.restore()
+    return frames / (perf_counter() - start), profiler
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless rendering benchmark")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), action="append",
+                        help="scenario to run (can be repeated, default: all)")
+    parser.add_argument("--frames", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-fps", type=float, default=0,
+                        help="fail if a scenario renders fewer frames per second")
+    args = parser.parse_args()
+    pg.init()
+    failed = False
+    for name in args.scenario or SCENARIOS:
+        fps, profiler = run(name, args.frames, args.seed)
+        print(f"== {name}: {fps:.0f} frames/s")
+        print(profiler.report())
+        if fps < args.min_fps:
+            print(f"Too slow: {fps:.0f} < {args.min_fps:.0f} frames/s")
+            failed = True
+    pg.quit()
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+Compact representation of an Abalone position for engines and servers.
+Each color is stored as a single integer bitmask. Cells are laid out on an
+11x11 grid (the 9x9 axial box of the board plus a ring of padding) so that
+moving every marble of a mask one step in a given direction is a single shift.
+Copying a position therefore costs a few int assignments, and moves are played
+and taken back in place by XOR-ing masks.
+
+A bitboard move is a tuple (own_xor, opp_xor, ejected):
+    own_xor: bits toggled in the mask of the color playing
+    opp_xor: bits toggled in the mask of its enemy
+    ejected: 1 if an enemy marble is pushed off the board, 0 otherwise
+"""
+
+import rules
+from zobrist import (
+    BLUE_KEY, YELLOW_KEY, BLUE_SCORE_KEYS, YELLOW_SCORE_KEYS, YELLOW_TO_PLAY,
+    hash_mask, hash_position)
+
+STRIDE = 11
+# Bit of every cell index (see rules.CELLS), q ranges from -4 to 4
+BIT = tuple(1 << ((r + 1) * STRIDE + q + 5) for q, r in rules.AXIAL)
+CELL_OF_BIT = {bit: i for i, bit in enumerate(BIT)}
+BOARD = sum(BIT)
+OUTSIDE = ((1 << (STRIDE * STRIDE)) - 1) ^ BOARD
+# Shift moving a mask one step towards every direction of rules.DIRECTIONS
+SHIFTS = tuple(dq + dr * STRIDE for dq, dr in rules.DIRECTIONS)
+# (axis, direction) pairs of broadside moves
+BROADSIDES = tuple(
+    (axis, d) for axis in rules.AXES for d in range(6) if d % 3 != axis
+)
+
+
+def shift(mask, s) -> int:
+    """Shifts a mask by s cells (towards the high bits if s > 0)."""
+    return mask << s if s > 0 else mask >> -s
+
+def bits(mask):
+    """Generates the single-bit masks of every bit set in mask."""
+    while mask:
+        bit = mask & -mask
+        yield bit
+        mask ^= bit
+
+def encode(move, color) -> tuple:
+    """
+    Converts a rules.Move into a bitboard move.
+
+    Parameters
+    ----------
+    move: rules.Move (required)
+        Move to be converted
+    color: int (required)
+        Color playing the move
+    Returns
+    -------
+    tuple:
+        (own_xor, opp_xor, ejected)
+    """
+    own_xor = opp_xor = 0
+    for cell, old, new in move.changes:
+        if old == color or new == color:
+            own_xor |= BIT[cell]
+        if old not in (color, rules.EMPTY) or new not in (color, rules.EMPTY):
+            opp_xor |= BIT[cell]
+    return own_xor, opp_xor, 1 if move.ejected else 0
+
+
+class Bitboard:
+    """
+    A class used to represent an Abalone position with two bitmasks.
+
+    Attributes
+    ----------
+    blue: int
+        Bitmask of the blue marbles
+    yellow: int
+        Bitmask of the yellow marbles
+    color: int
+        Color to play, 2 (blue) or 3 (yellow)
+    blue_score: int
+        Number of yellow marbles ejected by blue (Board.scores["Blue"])
+    yellow_score: int
+        Number of blue marbles ejected by yellow (Board.scores["Yellow"])
+    zobrist: int
+        64-bit Zobrist hash of the position, updated by self.make/unmake
+    """
+
+    __slots__ = ("blue", "yellow", "color", "blue_score", "yellow_score", "zobrist")
+
+    ######### Constructor #########
+    def __init__(self, blue=0, yellow=0, color=2, blue_score=0, yellow_score=0,
+                 zobrist_hash=None):
+        self.blue = blue
+        self.yellow = yellow
+        self.color = color
+        self.blue_score = blue_score
+        self.yellow_score = yellow_score
+        if zobrist_hash is None:
+            zobrist_hash = hash_position(
+                blue, yellow, color, blue_score, yellow_score)
+        self.zobrist = zobrist_hash
+
+    @classmethod
+    def from_cells(cls, cells, color, blue_score=0, yellow_score=0):
+        """
+        Builds a bitboard from a flat board (see rules.flatten).
+
+        Parameters
+        ----------
+        cells: list of int (required)
+            Flat board
+        color: int (required)
+            Color to play
+        blue_score: int (optional, default=0)
+            Number of yellow marbles ejected by blue
+        yellow_score: int (optional, default=0)
+            Number of blue marbles ejected by yellow
+        """
+        blue = yellow = 0
+        for bit, value in zip(BIT, cells):
+            if value == rules.BLUE:
+                blue |= bit
+            elif value == rules.YELLOW:
+                yellow |= bit
+        return cls(blue, yellow, color, blue_score, yellow_score)
+
+    ######### Methods #########
+    def to_cells(self) -> list:
+        """Returns the position as a flat board (see rules.flatten)."""
+        blue, yellow = self.blue, self.yellow
+        return [
+            rules.BLUE if blue & bit else rules.YELLOW if yellow & bit else rules.EMPTY
+            for bit in BIT
+        ]
+
+    def copy(self):
+        """Returns a copy of the position."""
+        return Bitboard(
+            self.blue, self.yellow, self.color, self.blue_score, self.yellow_score,
+            self.zobrist)
+
+    def key(self) -> tuple:
+        """Returns a hashable tuple identifying the position."""
+        return self.blue, self.yellow, self.color, self.blue_score, self.yellow_score
+
+    def check_win(self):
+        """Returns the winning color (see Board.check_win), False if none."""
+        if self.blue_score == 6:
+            return rules.BLUE
+        if self.yellow_score == 6:
+            return rules.YELLOW
+        return False
+
+    def legal_moves(self) -> list:
+        """
+        Returns every legal move of the color to play, as bitboard moves.
+        The moves are the same as the ones generated by rules.legal_moves.
+        """
+        if self.color == rules.BLUE:
+            own, opp = self.blue, self.yellow
+        else:
+            own, opp = self.yellow, self.blue
+        empty = BOARD ^ (own | opp)
+        free = empty | OUTSIDE # Where a pushed enemy marble can go
+        moves = []
+        append = moves.append
+        for s in SHIFTS:
+            # pk: cells whose k-th neighbour towards s belongs to the mask
+            p1_own = shift(own, -s)
+            p2_own = shift(own, -2*s)
+            line2 = own & p1_own
+            line3 = line2 & p2_own
+            # Inline moves without sumito (k marbles move to an empty cell)
+            for k, tails in (
+                    (1, own & shift(empty, -s)),
+                    (2, line2 & shift(empty, -2*s)),
+                    (3, line3 & shift(empty, -3*s))):
+                for bit in bits(tails):
+                    append((bit | shift(bit, k*s), 0, 0))
+            # Sumitos: k friendly marbles pushing m enemy ones
+            p3_opp = shift(opp, -3*s)
+            for k, m, tails in (
+                    (2, 1, line2 & shift(opp, -2*s) & shift(free, -3*s)),
+                    (3, 1, line3 & p3_opp & shift(free, -4*s)),
+                    (3, 2, line3 & p3_opp & shift(opp, -4*s) & shift(free, -5*s))):
+                for bit in bits(tails):
+                    head = shift(bit, k*s)
+                    landing = shift(bit, (k + m)*s)
+                    if landing & BOARD:
+                        append((bit | head, head | landing, 0))
+                    else:
+                        append((bit | head, head, 1))
+        # Broadside moves of 2 and 3 marbles
+        for axis, d in BROADSIDES:
+            a, s = SHIFTS[axis], SHIFTS[d]
+            pairs = own & shift(own, -a) & shift(empty, -s) & shift(empty, -a - s)
+            triples = pairs & shift(own, -2*a) & shift(empty, -2*a - s)
+            for bit in bits(pairs):
+                line = bit | shift(bit, a)
+                append((line | shift(line, s), 0, 0))
+            for bit in bits(triples):
+                line = bit | shift(bit, a) | shift(bit, 2*a)
+                append((line | shift(line, s), 0, 0))
+        return moves
+
+    def make(self, move) -> None:
+        """Plays a bitboard move in place and hands over to the enemy."""
+        own_xor, opp_xor, ejected = move
+        if self.color == rules.BLUE:
+            h = hash_mask(own_xor, BLUE_KEY) ^ hash_mask(opp_xor, YELLOW_KEY)
+            self.blue ^= own_xor
+            self.yellow ^= opp_xor
+            if ejected:
+                h ^= BLUE_SCORE_KEYS[self.blue_score]
+                self.blue_score += 1
+                h ^= BLUE_SCORE_KEYS[self.blue_score]
+            self.color = rules.YELLOW
+        else:
+            h = hash_mask(own_xor, YELLOW_KEY) ^ hash_mask(opp_xor, BLUE_KEY)
+            self.yellow ^= own_xor
+            self.blue ^= opp_xor
+            if ejected:
+                h ^= YELLOW_SCORE_KEYS[self.yellow_score]
+                self.yellow_score += 1
+                h ^= YELLOW_SCORE_KEYS[self.yellow_score]
+            self.color = rules.BLUE
+        self.zobrist ^= h ^ YELLOW_TO_PLAY
+
+    def unmake(self, move) -> None:
+        """Takes back the last bitboard move played with self.make."""
+        own_xor, opp_xor, ejected = move
+        if self.color == rules.YELLOW:
+            h = hash_mask(own_xor, BLUE_KEY) ^ hash_mask(opp_xor, YELLOW_KEY)
+            self.blue ^= own_xor
+            self.yellow ^= opp_xor
+            if ejected:
+                h ^= BLUE_SCORE_KEYS[self.blue_score]
+                self.blue_score -= 1
+                h ^= BLUE_SCORE_KEYS[self.blue_score]
+            self.color = rules.BLUE
+        else:
+            h = hash_mask(own_xor, YELLOW_KEY) ^ hash_mask(opp_xor, BLUE_KEY)
+            self.yellow ^= own_xor
+            self.blue ^= opp_xor
+            if ejected:
+                h ^= YELLOW_SCORE_KEYS[self.yellow_score]
+                self.yellow_score -= 1
+                h ^= YELLOW_SCORE_KEYS[self.yellow_score]
+            self.color = rules.YELLOW
+        self.zobrist ^= h ^ YELLOW_TO_PLAY
+
+    def to_move(self, move):
+        """
+        Converts a bitboard move of the color to play into a rules.Move.
+
+        Parameter
+        ---------
+        move: tuple (required)
+            Legal bitboard move
+        Returns
+        -------
+        rules.Move if the move is legal
+        None otherwise
+        """
+        for candidate in rules.legal_moves(self.to_cells(), self.color):
+            if encode(candidate, self.color) == move:
+                return candidate
+        return None
@@ -1,14 +1,50 @@
 import math
 import random
 import pygame as pg
-import display as dsp
 import constants as const
+import rules
+import symmetry
+from bitboard import Bitboard
 
-from pygame.locals import *
+from collections import namedtuple
 from copy import deepcopy
 
-pg.init()
+# Change applied to the board by a move (see Board.update), reversed by Board.revert
+#   marbles: (location, old value, new value) of every modified spot
+#   dead: (deadzone attribute, position, value) of the filled slot, None if no ejection
+#   move: rules.Move played (see Board.moves), None if unknown
+Delta = namedtuple("Delta", ["marbles", "dead", "move"])
 
+# Pixel centre of every cell (following rules.CELLS)
+CENTERS = tuple(
+    (int(const.FIRST_X - const.MARBLE_SIZE * (0.5*(rules.ROW_LENGTHS[r] - 5) - c - 0.5)),
+     int(const.FIRST_Y + const.MARBLE_SIZE * (r + 0.5)))
+    for r, c in rules.CELLS
+)
+
+def build_hit_map() -> bytearray:
+    """
+    Maps every pixel of the window to the marble drawn on it.
+    A pixel belongs to a marble if it lies strictly inside its circle.
+
+    Returns
+    -------
+    bytearray:
+        Cell index + 1 of the pixel (x, y) at y*WIDTH + x, 0 outside the marbles
+    """
+    width, height = int(const.WIDTH), int(const.HEIGHT)
+    hit_map = bytearray(width * height)
+    radius = const.MARBLE_SIZE // 2
+    for i, (c_x, c_y) in enumerate(CENTERS):
+        for dy in range(1 - radius, radius):
+            y = c_y + dy
+            half = math.isqrt(radius*radius - dy*dy - 1)
+            x0, x1 = max(c_x - half, 0), min(c_x + half + 1, width)
+            if 0 <= y < height and x0 < x1:
+                hit_map[y*width + x0:y*width + x1] = bytes((i + 1,)) * (x1 - x0)
+    return hit_map
+
+HIT_MAP = build_hit_map()
 
 class Board(pg.sprite.Sprite):
     """
@@ -19,13 +55,15 @@ class Board(pg.sprite.Sprite):
     IMPORTANT: Top-left marble's position defines the position of all marbles.
     This position is given by the const.FIRST_X and const.FIRST_Y given in constants.py
     
-    Parameter
-    ---------
+    Parameters
+    ----------
     configuration: list (optional, default=STANDARD)
         Initial positions of the marbles on the board.
         the STANDARD configuration (default) is the one commonly used in
         mainstream abalone games.
         See constants.py for more configurations.
+    seed: int (optional, default=None)
+        Seed of the random generator choosing the first player.
     Attributes
     ----------
     data: list (2D)
@@ -54,27 +92,58 @@ class Board(pg.sprite.Sprite):
     new_marbles: dict
         keys: tuple, values: int
         Defines the marbles that will be changed after a valid move
+    configuration: list (2D)
+        Starting configuration of the current game
+    first_color: int
+        Color that played the first move of the current game
+    moves: list
+        rules.Move played since the start of the game (see records.py)
+    buffer_move: rules.Move
+        Move that will be played after a valid move, None if there is none
+    move_index: dict
+        Legal moves of the current color (see self.get_move_index), None until computed
+    move_index_version: int
+        Value of self.version when move_index was computed
+    undo_stack: list
+        Delta of every move played, the last one being undone first
+    redo_stack: list
+        Delta of the moves undone, the last one being replayed first
+    version: int
+        Incremented every time the position (marbles and deadzones) changes.
+        Used by the display to know when to redraw the board.
     """
     
     ######### Constructor #########
-    def __init__(self, configuration=const.STANDARD):
+    def __init__(self, configuration=const.STANDARD, seed=None):
         """
         Initializes the starting configuration and all the attributes.
 
-        Parameter
-        ---------
+        Parameters
+        ----------
         configuration: list (optional, default=STANDARD)
             Starting configuration. Other configurations can be found in constants.py
+        seed: int (optional, default=None)
+            Seed of the random generator choosing the first player
         """
         super().__init__()
+        self.rng = random.Random(seed)
+        self.configuration = deepcopy(configuration)
         self.data = deepcopy(configuration)
         self.blue_deadzone = deepcopy(const.BLUE_DEADZONE)
         self.yellow_deadzone = deepcopy(const.YELLOW_DEADZONE)
-        self.current_color = random.choice((2, 3))
+        self.current_color = self.rng.choice((2, 3))
+        self.first_color = self.current_color
         self.scores = {"Blue": 0, "Yellow": 0}
+        self.moves = []
         self.new_colors = {}
         self.new_marbles = {}
         self.buffer_dead_marble = {}
+        self.buffer_move = None
+        self.move_index = None
+        self.move_index_version = None
+        self.undo_stack = []
+        self.redo_stack = []
+        self.version = 0
 
     ######### Methods #########
     def get_enemy(self) -> int:
@@ -96,13 +165,7 @@ class Board(pg.sprite.Sprite):
         tuple:
             Marble center
         """
-        r, c = loc
-        len_r = len(self.data[r])
-        m_x = const.FIRST_X - const.MARBLE_SIZE * (0.5*(len_r-5) - c)
-        m_y = const.FIRST_Y + const.MARBLE_SIZE * r
-        m_x += const.MARBLE_SIZE*0.5
-        m_y += const.MARBLE_SIZE*0.5
-        return int(m_x), int(m_y)
+        return CENTERS[rules.INDEX[loc]]
 
     def get_value(self, loc) -> int:
         """
@@ -136,7 +199,8 @@ class Board(pg.sprite.Sprite):
         """
         Normalizes the position given into its location (row, column) on self.data
         For instance, clicking on the top-left marble will return 0, 0 as it is 
-        the first marble in self.data
+        the first marble in self.data.
+        The position must lie inside the marble's circle (see HIT_MAP).
 
         Parameter
         ---------
@@ -149,14 +213,10 @@ class Board(pg.sprite.Sprite):
         False if the position cannot be normalized (out of bounds)
         """
         x, y = position
-        # Getting row index
-        r = (y - const.FIRST_Y) // const.MARBLE_SIZE 
-        if 0 <= r < len(self.data): # len(self.data) = 9: Abalone board game has 9 rows
-            len_row = len(self.data[r])
-            c = (x - (const.FIRST_X - 0.5*(len_row-5) * const.MARBLE_SIZE))
-            c //= const.MARBLE_SIZE
-            if 0 <= int(c) in range(0, len_row):
-                return r, int(c)
+        if 0 <= x < const.WIDTH and 0 <= y < const.HEIGHT:
+            cell = HIT_MAP[int(y)*int(const.WIDTH) + int(x)]
+            if cell:
+                return rules.CELLS[cell - 1]
         return False
     
     def push_marble(self, origin, target) -> bool:
@@ -164,8 +224,9 @@ class Board(pg.sprite.Sprite):
         Pushes a single marble towards its target and analyzes the direction
         in which the push is being performed.
         It includes pushing friendly marbles both with no sumito and sumito.
-        It also checks if the move is possible. More than 3 friendly marbles cannot
-        be moved at the same time.  Also, a sumito can be invalid: if the number 
+        The move is looked up among the legal moves of the turn (see self.get_move_index),
+        the rules themselves being checked by rules.push: more than 3 friendly marbles
+        cannot be moved at the same time and a sumito is invalid if the number
         of enemy marbles is higher or equal to the number of friendly marbles
         or if an enemy marble is followed by a friendly marble.
 
@@ -181,79 +242,165 @@ class Board(pg.sprite.Sprite):
             True if the move is valid, False otherwise
         """
         self.clear_buffers()
-        self.new_marbles[origin] = 1 # If the move is valid, the picked marble will become free
-        origin_center = self.get_center(origin)
-        target_center = self.get_center(target)
-        target_value = self.get_value(target)
-        buffer_target = target
-        friend = self.current_color
-        enemy = self.get_enemy()
-        colors = [friend] # To keep track of the colors we meet
-        sumito = False        
-
-        while True:        
-            # Checking if we're killing a marble (this cannot occur during the first iteration)
-            if not target:
-                # Position of the buffer dead marble
-                dead = next_spot[0], next_spot[1]
-                if self.buffer_dead_marble: 
-                    self.buffer_dead_marble.clear()
-                last_marble = colors[-1]
-                self.buffer_dead_marble[dead] = -last_marble
-                return True
+        o, t = rules.INDEX[origin], rules.INDEX[target]
+        d = rules.direction(o, t)
+        move = None
+        if d is not None:
+            move = self.get_move_index().get((o, d))
+        if move is None:
+            self.new_colors[target] = const.MARBLE_RED # Invalid move
+            return False
+        self.load_move(move)
+        # Showing where the last marble of the line lands (if not ejected)
+        if not move.ejected:
+            landing, _, value = move.changes[-1]
+            if value == 2:
+                self.new_colors[rules.CELLS[landing]] = const.MARBLE_BLUE
             else:
-                target_center = self.get_center(target)
-                target_value = self.get_value(target)
-                    
-            if target_value in (enemy, friend):
-                colors.append(target_value)
-            own_marble = target_value == friend
-            other_marble = target_value in (enemy, 1)
-            # A potential sumito occurs when the enemy color is met
-            sumito = enemy in colors
-            # Cannot push more than 3 marbles
-            too_much_marbles = colors.count(friend) > 3
-            # Checking for a potential invalid sumito
-            too_much_enemy = colors.count(enemy) >= colors.count(friend)
-            squeezed_enemy = enemy in colors and target_value == friend
-            invalid_sumito = too_much_enemy or squeezed_enemy
-            if too_much_marbles or invalid_sumito:
-                self.new_colors[buffer_target] = const.MARBLE_RED # Invalid move
-                return False
-            # If we keep finding our own marbles
-            if own_marble and target not in self.new_marbles.keys():
-                self.new_marbles[target] = friend
-            # Meeting an enemy or a free spot
-            elif other_marble:
-                if sumito:
-                    # Not a big fan of ternary conditional operator tbf
-                    if self.get_value(origin) == friend:
-                        self.new_marbles[target] = friend
-                    else:
-                        self.new_marbles[target] = enemy
+                self.new_colors[rules.CELLS[landing]] = const.MARBLE_YELLOW
+        return True
+
+    def load_move(self, move) -> None:
+        """
+        Fills the buffers (new_marbles and buffer_dead_marble) with a move
+        so that it gets played when calling self.update()
+
+        Parameter
+        ---------
+        move: rules.Move (required)
+            Move to be played, as given by the rules module
+        """
+        self.new_marbles.clear()
+        self.buffer_dead_marble.clear()
+        self.buffer_move = move
+        for cell, _, value in move.changes:
+            self.new_marbles[rules.CELLS[cell]] = value
+        if move.ejected:
+            dead = self.get_exit_center(move)
+            self.buffer_dead_marble[dead] = -move.ejected
+
+    def legal_moves(self):
+        """
+        Generates every legal move of the current color.
+        Does not depend on the display: see rules.legal_moves.
+
+        Yields
+        ------
+        rules.Move:
+            Legal move
+        """
+        return rules.legal_moves(rules.flatten(self.data), self.current_color)
+
+    def get_move_index(self) -> dict:
+        """
+        Returns every legal move of the current color, computed once per turn:
+        the index is rebuilt only after the position changed (see self.version),
+        i.e. after update, reset, undo, redo or load_bitboard.
+
+        Returns
+        -------
+        dict:
+            keys: (cell, direction) for inline moves, cell being the rear marble,
+                  (frozenset of cells, direction) for broadside moves
+            values: rules.Move
+        """
+        if self.move_index_version != self.version:
+            index = {}
+            for move in self.legal_moves():
+                marbles, d = move.marbles, move.direction
+                if len(marbles) == 1 or rules.direction(marbles[0], marbles[1]) % 3 == d % 3:
+                    index[marbles[0], d] = move
                 else:
-                    self.new_marbles[target] = friend
-                # Loop ends if a free spot is reached
-                if target_value == 1:
-                    if colors[-1] == 2:
-                        self.new_colors[target] = const.MARBLE_BLUE
-                    else: 
-                        self.new_colors[target] = const.MARBLE_YELLOW
-                    return True
-            # Getting the next spot
-            n_x = (target_center[0] - origin_center[0]) / const.MARBLE_SIZE
-            n_y = (target_center[1] - origin_center[1]) / const.MARBLE_SIZE
-            next_spot = self.next_spot(target_center, n_x, n_y)
-            # Updating origin/target positions
-            origin_center = target_center
-            origin = self.normalize_coordinates(origin_center)
-            target = self.normalize_coordinates(next_spot)
+                    index[frozenset(marbles), d] = move
+            self.move_index = index
+            self.move_index_version = self.version
+        return self.move_index
+
+    def play(self, move) -> None:
+        """
+        Plays a move (e.g. given by self.legal_moves) and hands over to the enemy.
+
+        Parameter
+        ---------
+        move: rules.Move (required)
+            Legal move of the current color
+        """
+        self.clear_buffers()
+        self.load_move(move)
+        self.update()
+        self.clear_buffers()
+
+    def to_bitboard(self) -> Bitboard:
+        """Returns the position (marbles, current color and scores) as a Bitboard."""
+        return Bitboard.from_cells(
+            rules.flatten(self.data), self.current_color,
+            self.scores["Blue"], self.scores["Yellow"])
+
+    def canonical_key(self) -> tuple:
+        """
+        Returns the key shared by every position equivalent to this one
+        (symmetric board, swapped colors) and the transform leading to it.
+        See symmetry.canonical.
+        """
+        return symmetry.canonical(
+            rules.flatten(self.data), self.current_color,
+            self.scores["Blue"], self.scores["Yellow"])
+
+    def load_bitboard(self, bitboard) -> None:
+        """
+        Sets the board to the position of a Bitboard.
+        The deadzones are refilled according to the scores.
+
+        Parameter
+        ---------
+        bitboard: Bitboard (required)
+            Position to be loaded
+        """
+        self.data = rules.unflatten(bitboard.to_cells())
+        self.current_color = bitboard.color
+        self.scores["Blue"] = bitboard.blue_score
+        self.scores["Yellow"] = bitboard.yellow_score
+        self.blue_deadzone = deepcopy(const.BLUE_DEADZONE)
+        self.yellow_deadzone = deepcopy(const.YELLOW_DEADZONE)
+        for deadzone, value, n_dead in (
+                (self.blue_deadzone, -2, bitboard.yellow_score),
+                (self.yellow_deadzone, -3, bitboard.blue_score)):
+            for pos in list(deadzone)[:n_dead]:
+                deadzone[pos] = value
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.clear_buffers()
+        self.version += 1
+
+    def get_exit_center(self, move) -> tuple:
+        """
+        Returns the center of the spot (outside of the board) where 
+        the marble ejected by a move is displayed.
+        The center is expressed in the Pygame frame (x-pixels x y-pixels)
+
+        Parameter
+        ---------
+        move: rules.Move (required)
+            Move ejecting a marble
+        Returns
+        -------
+        tuple:
+            Center of the spot
+        """
+        cell, d = move.marbles[-1], move.direction
+        while rules.NEIGHBOURS[cell][d] != rules.OFF:
+            cell = rules.NEIGHBOURS[cell][d]
+        q, r = rules.AXIAL[cell]
+        dq, dr = rules.DIRECTIONS[d]
+        m_x = const.FIRST_X + const.MARBLE_SIZE * (q + dq + 0.5*(r + dr) + 0.5)
+        m_y = const.FIRST_Y + const.MARBLE_SIZE * (r + dr + 0.5)
+        return int(m_x), int(m_y)
     
     def select_range(self, pick, value):
         """
         Select a range of marbles by holding left-shift and left-mouseclick.
         If the selected range is valid, the marbles will become purple (display purposes only).
-        Returns the centers of the marbles in the range (if valid).
+        Returns the locations of the marbles in the range (if valid).
 
         Parameter
         ---------
@@ -261,8 +408,8 @@ class Board(pg.sprite.Sprite):
             Current marble being selected 
         Returns
         -------
-        centers: list
-            Centers of the marbles defining the range
+        selection: list
+            (row, column) locations of the marbles defining the range
         """
         # No need to check as a possibility (valid or not) has been found already
         if const.MARBLE_GREEN in self.new_colors.values():
@@ -272,13 +419,13 @@ class Board(pg.sprite.Sprite):
         if value == self.current_color:
             # Selected marble will become a free spot (if possible)
             self.new_marbles[pick] = 1 
-        centers = [self.get_center(c) for c in self.new_marbles.keys()]
+        selection = list(self.new_marbles.keys())
         # Checking range validity
-        if self.check_range(value, centers):
+        if self.check_range(value, selection):
             self.new_colors[pick] = const.MARBLE_PURPLE 
-        return centers
+        return selection
 
-    def check_range(self, value, centers) -> bool:
+    def check_range(self, value, selection) -> bool:
         """
         Check if a range of marbles is valid.
         The range must contains only the current color being played.
@@ -290,8 +437,8 @@ class Board(pg.sprite.Sprite):
         ----------
         value: int (required)
             Color of the selected marble. Must be equal to the current color
-        centers: list (required)
-            Centers of the marbles defining the range to be checked
+        selection: list (required)
+            (row, column) locations of the marbles defining the range to be checked
         Returns
         -------
         bool:
@@ -299,25 +446,11 @@ class Board(pg.sprite.Sprite):
         """
         if value != self.current_color:
             return False
-        if len(centers) == 2:
-            p0, p1 = centers[0], centers[1]
-            d_p0_p1 = self.distance(p0, p1)
-            # Only neighbouring marbles can form a range of 2
-            if d_p0_p1 > const.MAX_DISTANCE_MARBLE:
-                return False
-        if len(centers) == 3:
-            p0, p1, p2 = centers[0], centers[1], centers[2]
-            d_p0_p1 = self.distance(p0, p1)
-            d_p0_p2 = self.distance(p0, p2)
-            # A misaligned range of 3 results in an invalid range
-            if int(d_p0_p2) != int(d_p0_p1*2):
-                return False
-        # A range of more than 3 marbles is invalid 
-        if len(centers) > 3:
-            return False 
-        return True 
+        if len(selection) == 1:
+            return True
+        return rules.line_axis(rules.INDEX[loc] for loc in selection) is not None
 
-    def new_range(self, target, centers) -> bool:
+    def new_range(self, target, selection) -> bool:
         """
         Computes the new range of marbles with respect to the selected one
         and the targetted marble. The new ranges must be valid, meaning it
@@ -327,87 +460,161 @@ class Board(pg.sprite.Sprite):
         ----------
         target: tuple (required)
             (row, column) location in self.data of the targetted marble 
-        centers: list (required)
-            Centers of the marbles defining the range
+        selection: list (required)
+            (row, column) locations of the marbles defining the range
         Returns
         -------
         bool:
             True if the new range is valid, False otherwise
         """
-        if self.get_value(target) != self.current_color and len(centers) in (2, 3):
-            target_center = self.get_center(target)
-            origin = centers[-1][0], centers[-1][1]
-            nx = (target_center[0] - origin[0]) / const.MARBLE_SIZE
-            ny = (target_center[1] - origin[1]) / const.MARBLE_SIZE
-            new_centers = [self.next_spot(c, nx, ny) for c in centers]
-            new_centers = [self.normalize_coordinates(c) for c in new_centers]
-            # If new_centers cannot be all normalized, an out of bounds has been reached
-            if not all(new_centers):
-                nonfree_spots = False
-            else:
-                # If one on the new spots isn't free
-                nonfree_spots = any(self.get_value(c) != 1 for c in new_centers)
-            # Or if the target isn't in the neigbourhood
-            not_neighbour = (
-                self.distance(centers[-1], target_center) 
-                > const.MAX_DISTANCE_MARBLE)
-            if nonfree_spots or not_neighbour:
+        if self.get_value(target) != self.current_color and len(selection) in (2, 3):
+            # The target must be in the neighbourhood of the last selected marble
+            d = rules.direction(rules.INDEX[selection[-1]], rules.INDEX[target])
+            move = None
+            if d is not None:
+                cells = frozenset(rules.INDEX[loc] for loc in selection)
+                move = self.get_move_index().get((cells, d))
+            if move is None:
                 if const.MARBLE_RED not in self.new_colors.values():
-                    self.new_colors[new_centers[-1]] = const.MARBLE_RED
+                    self.new_colors[target] = const.MARBLE_RED
                     self.new_marbles.clear()
-                    return False
+                    self.buffer_move = None
+                return False
             # Valid move otherwise
-            for new_c in new_centers:
-                self.new_colors[new_c] = const.MARBLE_GREEN 
-                self.new_marbles[new_c] = self.current_color
+            self.load_move(move)
+            for cell, _, value in move.changes:
+                if value == self.current_color:
+                    self.new_colors[rules.CELLS[cell]] = const.MARBLE_GREEN 
             return True
         return False
     
-    def update(self) -> None:
-        """Update the board and deadzones states"""
-        # Updating board
-        for pos, value in self.new_marbles.items():
-            x, y = pos
-            self.data[x][y] = value
-        # Updating deadzone if killing one marble
+    def update(self) -> bool:
+        """
+        Update the board and deadzones states.
+        The change is recorded in the undo stack, which clears the redo stack.
+        Nothing happens if no move is buffered (see self.load_move), so that
+        the turn never passes without a move being recorded in self.moves.
+
+        Returns
+        -------
+        bool:
+            True if a move was played, False otherwise
+        """
+        if self.buffer_move is None:
+            return False
+        marbles = tuple(
+            (pos, self.get_value(pos), value) for pos, value in self.new_marbles.items())
+        # Getting the deadzone slot filled by the killed marble (blue or yellow)
+        dead = None
         if self.buffer_dead_marble:
             value = next(iter(self.buffer_dead_marble.values()))
-            # Getting the deadzone corresponding to the killed marble (blue or yellow)
-            if value == -2:
-                self.scores["Yellow"] += 1
-                deadzone = self.blue_deadzone
-            else:
-                self.scores["Blue"] += 1
-                deadzone = self.yellow_deadzone
-            # Filling the deadzone with killed marble
+            name = "blue_deadzone" if value == -2 else "yellow_deadzone"
+            deadzone = getattr(self, name)
             for pos in deadzone:
                 if deadzone[pos] == 1:
-                    deadzone[pos] = value
+                    dead = (name, pos, value)
                     break
+        delta = Delta(marbles, dead, self.buffer_move)
+        self.apply(delta)
+        self.undo_stack.append(delta)
+        self.redo_stack.clear()
+        return True
+
+    def apply(self, delta) -> None:
+        """
+        Plays a recorded change and hands over to the enemy.
+        Its cost only depends on the number of marbles moved.
+
+        Parameter
+        ---------
+        delta: Delta (required)
+            Change to be applied, as recorded by self.update
+        """
+        for (x, y), _, value in delta.marbles:
+            self.data[x][y] = value
+        if delta.dead:
+            name, pos, value = delta.dead
+            getattr(self, name)[pos] = value
+            # Killing a blue marble scores for yellow and vice versa
+            self.scores["Yellow" if value == -2 else "Blue"] += 1
+        if delta.move is not None:
+            self.moves.append(delta.move)
         # Updating current player's color
         self.current_color = self.get_enemy()
-        
-    def reset(self, configuration=const.STANDARD):
+        self.version += 1
+
+    def revert(self, delta) -> None:
         """
-        Resets and sets a new game.
+        Takes back a change applied by self.apply (the last one applied).
 
         Parameter
         ---------
+        delta: Delta (required)
+            Change to be reverted
+        """
+        for (x, y), value, _ in delta.marbles:
+            self.data[x][y] = value
+        if delta.dead:
+            name, pos, value = delta.dead
+            getattr(self, name)[pos] = 1
+            self.scores["Yellow" if value == -2 else "Blue"] -= 1
+        if delta.move is not None:
+            self.moves.pop()
+        self.current_color = self.get_enemy()
+        self.version += 1
+
+    def undo(self) -> bool:
+        """Takes back the last move played. Returns False if there is none."""
+        if not self.undo_stack:
+            return False
+        delta = self.undo_stack.pop()
+        self.clear_buffers()
+        self.revert(delta)
+        self.redo_stack.append(delta)
+        return True
+
+    def redo(self) -> bool:
+        """Replays the last move undone. Returns False if there is none."""
+        if not self.redo_stack:
+            return False
+        delta = self.redo_stack.pop()
+        self.clear_buffers()
+        self.apply(delta)
+        self.undo_stack.append(delta)
+        return True
+        
+    def reset(self, configuration=const.STANDARD, seed=None):
+        """
+        Resets and sets a new game.
+
+        Parameters
+        ----------
         configuration: list (optional, default=STANDARD)
+        seed: int (optional, default=None)
+            Reseeds the random generator choosing the first player
         """
-        self.current_color = random.choice((2, 3))
+        if seed is not None:
+            self.rng.seed(seed)
+        self.current_color = self.rng.choice((2, 3))
+        self.first_color = self.current_color
         self.scores["Blue"] = 0
         self.scores["Yellow"] = 0
+        self.moves = []
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.configuration = deepcopy(configuration)
         self.data = deepcopy(configuration)
         self.blue_deadzone = deepcopy(const.BLUE_DEADZONE)
         self.yellow_deadzone = deepcopy(const.YELLOW_DEADZONE)
         self.clear_buffers()
+        self.version += 1
 
     def clear_buffers(self):
         """Clears the data structures that can potentially change each turn."""
         self.new_marbles.clear()
         self.new_colors.clear()
         self.buffer_dead_marble.clear()
+        self.buffer_move = None
             
     ######### Static Methods #########
     @staticmethod
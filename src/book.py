@@ -0,0 +1,349 @@
+"""
+Opening books of the built-in layouts, precomputed offline.
+A book maps positions to the moves found by a deep search. It is a sorted
+array of fixed-size records opened with mmap: nothing is loaded when the
+book is opened, a lookup is a binary search touching a few pages, and every
+process using the same book shares its pages through the OS page cache.
+
+File format (big-endian):
+    header: b"ABK1", number of records (uint32), record size (uint16), 6 bytes
+    records of 16 bytes, sorted by key, then by decreasing depth and score:
+        key: first 8 bytes of the blake2b hash of the canonical key of the
+             position (see symmetry.py), symmetric positions sharing it
+        marbles: up to 3 cells of the move in the canonical frame (255: none),
+             the rear marble for an inline move (see records.notation)
+        direction: direction of the move in the canonical frame
+        score: search score for the color to play, clamped to int16
+        depth: search depth
+
+Books are built by searching every position reached by the best few moves
+of both sides from a layout, and can be merged (the deepest search of a
+move is kept):
+
+Usage:
+    python src/book.py build --all                       # books/<LAYOUT>.abk
+    python src/book.py build --layout STANDARD --plies 6 --time 0 --depth 5 --output standard.abk
+    python src/book.py merge books/STANDARD.abk standard.abk --output books/STANDARD.abk
+    python src/book.py show books/STANDARD.abk --layout STANDARD
+"""
+
+import argparse
+import hashlib
+import math
+import mmap
+import os
+import struct
+from collections import Counter
+from time import perf_counter
+
+import rules
+import symmetry
+from bitboard import Bitboard, encode
+from engine import Engine, evaluate
+from layouts import LAYOUTS
+from records import COLOR_NAMES, direction_of_line, notation
+
+BOOK_DIR = os.path.join(os.path.dirname(__file__), "../books")
+MAGIC = b"ABK1"
+HEADER = struct.Struct(">4sIH6x")
+RECORD = struct.Struct(">8s3sBhB1x")
+NO_CELL = 255
+# Default build settings
+PLIES = 4 # Plies expanded from the starting position
+WIDTH = 3 # Moves expanded per position, best first by static evaluation
+DEPTH = 6 # Maximum search depth of every position
+TIME = 60.0 # Search time budget of every position (seconds), the game's being 2s
+
+
+def book_path(layout) -> str:
+    """Returns the path of the prebuilt book of a layout."""
+    return os.path.join(BOOK_DIR, f"{layout}.abk")
+
+def position_hash(cells, color, blue_score=0, yellow_score=0) -> tuple:
+    """
+    Returns the key of a position in a book and the transform to the canonical frame.
+
+    Returns
+    -------
+    tuple:
+        (key: bytes of 8, symmetry.Transform)
+    """
+    key, transform = symmetry.canonical(cells, color, blue_score, yellow_score)
+    return hashlib.blake2b(key, digest_size=8).digest(), transform
+
+def move_cells(move) -> tuple:
+    """Returns the cells identifying a rules.Move: its rear marble if inline, else all of them."""
+    if move.direction % 3 == direction_of_line(move.marbles):
+        return move.marbles[:1]
+    return tuple(move.marbles)
+
+def pack(key, marbles, d, score, depth) -> bytes:
+    """Returns a record (see the module's docstring), marbles being in the canonical frame."""
+    cells = bytes(marbles) + bytes([NO_CELL] * (3 - len(marbles)))
+    return RECORD.pack(key, cells, d, max(-32767, min(32767, score)), min(depth, 255))
+
+
+class Book:
+    """
+    Read-only opening book mapped in memory.
+
+    Parameter
+    ---------
+    path: str (required)
+        Book file (see the module's docstring)
+    """
+
+    ######### Constructor #########
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.size, record_size = HEADER.unpack_from(self.map)
+        if magic != MAGIC or record_size != RECORD.size:
+            self.map.close()
+            raise ValueError(f"Not an opening book: {path}")
+        if HEADER.size + self.size * RECORD.size > len(self.map):
+            self.map.close()
+            raise ValueError(f"Truncated opening book: {path}")
+
+    ######### Methods #########
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        """Generates every record as (key, marbles, direction, score, depth)."""
+        for i in range(self.size):
+            yield self.record(i)
+
+    def record(self, i) -> tuple:
+        """Returns the record i as (key, marbles, direction, score, depth)."""
+        key, cells, d, score, depth = RECORD.unpack_from(self.map, HEADER.size + i * RECORD.size)
+        return key, tuple(c for c in cells if c != NO_CELL), d, score, depth
+
+    def key_at(self, i) -> bytes:
+        """Returns the key of the record i, read straight from the mapped file."""
+        offset = HEADER.size + i * RECORD.size
+        return self.map[offset:offset + 8]
+
+    def entries(self, key) -> list:
+        """Returns the records of a key, deepest and best first (binary search)."""
+        low, high = 0, self.size
+        while low < high:
+            middle = (low + high) // 2
+            if self.key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        entries = []
+        while low < self.size and self.key_at(low) == key:
+            entries.append(self.record(low))
+            low += 1
+        return entries
+
+    def lookup(self, cells, color, blue_score=0, yellow_score=0) -> list:
+        """
+        Returns the book moves of a position, deepest search and best score first.
+
+        Parameters
+        ----------
+        cells: list of int (required)
+            Flat board (see rules.flatten)
+        color: int (required)
+            Color to play
+        blue_score: int (optional, default=0)
+            Number of yellow marbles ejected by blue
+        yellow_score: int (optional, default=0)
+            Number of blue marbles ejected by yellow
+        Returns
+        -------
+        list:
+            (rules.Move, score, depth), moves being legal on cells
+        """
+        key, transform = position_hash(cells, color, blue_score, yellow_score)
+        inverse = symmetry.INVERSES[transform.index]
+        moves = []
+        for _, marbles, d, score, depth in self.entries(key):
+            marbles, d = symmetry.transform_move(marbles, d, inverse)
+            if len(marbles) == 1:
+                move = rules.push(cells, color, marbles[0], d) if cells[marbles[0]] == color else None
+            else:
+                move = rules.broadside(cells, color, marbles, d)
+            # A hash collision is not a legal move of the position
+            if move is not None:
+                moves.append((move, score, depth))
+        return moves
+
+    def probe(self, position):
+        """
+        Returns the best book move of a Bitboard.
+
+        Returns
+        -------
+        tuple if the position is in the book
+            (Bitboard move, score, depth)
+        None otherwise
+        """
+        moves = self.lookup(
+            position.to_cells(), position.color, position.blue_score, position.yellow_score)
+        if not moves:
+            return None
+        move, score, depth = moves[0]
+        return encode(move, position.color), score, depth
+
+    def close(self) -> None:
+        """Unmaps the book file."""
+        self.map.close()
+
+
+def open_books(folder=BOOK_DIR) -> list:
+    """Opens every book (*.abk) of a folder, an empty list if there is none."""
+    if not os.path.isdir(folder):
+        return []
+    return [Book(os.path.join(folder, name))
+            for name in sorted(os.listdir(folder)) if name.endswith(".abk")]
+
+def write(path, records) -> None:
+    """
+    Writes records to a book file, sorted and without duplicates.
+
+    Parameters
+    ----------
+    path: str (required)
+        Book file
+    records: iterable of bytes (required)
+        Records packed with pack (a move keeps its deepest search)
+    """
+    best = {}
+    for record in records:
+        key, cells, d, score, depth = RECORD.unpack(record)
+        previous = best.get((key, cells, d))
+        if previous is None or RECORD.unpack(previous)[4] < depth:
+            best[key, cells, d] = record
+    ordered = sorted(
+        best.values(), key=lambda r: (r[:8], -RECORD.unpack(r)[4], -RECORD.unpack(r)[3]))
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(ordered), RECORD.size))
+        f.writelines(ordered)
+
+def merge(paths, output) -> int:
+    """Merges books into a new one (see write), returns its number of records."""
+    records = []
+    for path in paths:
+        book = Book(path)
+        records += [pack(*record) for record in book]
+        book.close()
+    write(output, records)
+    return len(set(r[:8] for r in records))
+
+def build(layout, plies=PLIES, width=WIDTH, depth=DEPTH, time_limit=TIME, log=print) -> list:
+    """
+    Searches the positions of a layout's opening, both colors playing first.
+    From every position, the width best moves by static evaluation and the
+    move found by the search are expanded, up to plies moves from the start.
+
+    Parameters
+    ----------
+    layout: str (required)
+        Name of the starting configuration (see layouts.py)
+    plies: int (optional, default=PLIES)
+        Plies expanded from the starting position
+    width: int (optional, default=WIDTH)
+        Moves expanded per position
+    depth: int (optional, default=DEPTH)
+        Maximum search depth of every position
+    time_limit: float (optional, default=TIME)
+        Search time budget of every position (seconds), math.inf to always
+        reach depth
+    log: callable (optional, default=print)
+        Receives a progress message per ply, None to stay silent
+    Returns
+    -------
+    list:
+        Records (see pack)
+    """
+    engine = Engine(time_limit=time_limit, max_depth=depth)
+    cells = rules.flatten(LAYOUTS[layout])
+    frontier = [Bitboard.from_cells(cells, color) for color in (rules.BLUE, rules.YELLOW)]
+    seen, records = set(), []
+    start = perf_counter()
+    for ply in range(plies + 1):
+        next_frontier = []
+        for position in frontier:
+            key, transform = position_hash(
+                position.to_cells(), position.color, position.blue_score, position.yellow_score)
+            if key in seen or position.check_win():
+                continue
+            seen.add(key)
+            best = engine.search(position)
+            if best is None:
+                continue
+            move = position.to_move(best)
+            marbles, d = symmetry.transform_move(move_cells(move), move.direction, transform.index)
+            records.append(pack(key, marbles, d, engine.score, engine.depth))
+            if ply == plies:
+                continue
+            # Candidates ordered by the evaluation of the enemy after the move
+            candidates = []
+            for candidate in position.legal_moves():
+                position.make(candidate)
+                candidates.append((evaluate(position), candidate))
+                position.unmake(candidate)
+            candidates.sort(key=lambda c: c[0])
+            expanded = [best] + [c for _, c in candidates if c != best][:width - 1]
+            for candidate in expanded:
+                child = position.copy()
+                child.make(candidate)
+                next_frontier.append(child)
+        frontier = next_frontier
+        if log:
+            log(f"{layout} ply {ply}: {len(records)} positions ({perf_counter() - start:.0f}s)")
+    return records
+
+def main():
+    parser = argparse.ArgumentParser(description="Builds, merges and shows opening books")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="builds the book of a layout")
+    build_parser.add_argument("--layout", choices=sorted(LAYOUTS), action="append",
+                              help="layout to be built (can be repeated)")
+    build_parser.add_argument("--all", action="store_true", help="builds every layout")
+    build_parser.add_argument("--plies", type=int, default=PLIES)
+    build_parser.add_argument("--width", type=int, default=WIDTH)
+    build_parser.add_argument("--depth", type=int, default=DEPTH, help="maximum search depth")
+    build_parser.add_argument("--time", type=float, default=TIME,
+                              help="search time per position in seconds (0: no limit)")
+    build_parser.add_argument("--output", help="book file (default: books/<LAYOUT>.abk)")
+    merge_parser = commands.add_parser("merge", help="merges books")
+    merge_parser.add_argument("books", nargs="+")
+    merge_parser.add_argument("--output", required=True)
+    show_parser = commands.add_parser("show", help="shows the book moves of a starting position")
+    show_parser.add_argument("book")
+    show_parser.add_argument("--layout", choices=sorted(LAYOUTS), default="STANDARD")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        layouts = sorted(LAYOUTS) if args.all else args.layout
+        if not layouts:
+            parser.error("build requires --layout or --all")
+        if args.output and len(layouts) > 1:
+            parser.error("--output requires a single layout")
+        os.makedirs(BOOK_DIR, exist_ok=True)
+        for layout in layouts:
+            path = args.output or book_path(layout)
+            records = build(layout, args.plies, args.width, args.depth, args.time or math.inf)
+            write(path, records)
+            depths = Counter(RECORD.unpack(record)[4] for record in records)
+            print(f"{path}: {os.path.getsize(path)} bytes, positions per depth "
+                  + ", ".join(f"{depth}: {n}" for depth, n in sorted(depths.items())))
+    elif args.command == "merge":
+        print(f"{args.output}: {merge(args.books, args.output)} positions")
+    else:
+        book = Book(args.book)
+        print(f"{args.book}: {len(book)} records")
+        cells = rules.flatten(LAYOUTS[args.layout])
+        for color in (rules.BLUE, rules.YELLOW):
+            for move, score, depth in book.lookup(cells, color):
+                print(f"{COLOR_NAMES[color]:<7} {notation(move):<10} score {score:>6}  depth {depth}")
+        book.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Clients of the Abalone server (see server.py).
+RemoteGame connects the pygame window to a session: the server's messages
+are read by a background thread and posted as pygame events, so that the
+event-driven game loop wakes up when the opponent moves.
+
+The load test plays many games at once over localhost, only keeping the
+cells of every game (updated from the server's diffs):
+
+    python src/client.py --idle 2000 --active 200 --plies 50
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import socket
+import statistics
+import threading
+from time import perf_counter
+
+import pygame as pg
+
+import rules
+from records import GameRecord, Replay, notation
+from server import HOST, PORT, encode
+
+# Type of the pygame events carrying the server's messages (event.message)
+NETWORK_EVENT = pg.USEREVENT + 1
+
+
+class RemoteGame:
+    """
+    Connection of the game window to a session of the server.
+    Creates a new session, or joins an existing one.
+
+    Parameters
+    ----------
+    host: str (required)
+        Address of the server
+    port: int (required)
+        Port of the server
+    session: str (optional, default=None)
+        Session to be joined, None to create a new one
+    layout: str (optional, default="STANDARD")
+        Starting configuration of a new session
+
+    Attributes
+    ----------
+    session: str
+        Identifier of the session, to be given to the opponent
+    color: int
+        Color played through this connection
+    state: dict
+        Position when joining (see server.session_state)
+    ply: int
+        Number of moves confirmed by the server, moves played locally
+        beyond it being taken back if the server rejects them
+    """
+
+    ######### Constructor #########
+    def __init__(self, host, port, session=None, layout="STANDARD"):
+        self.socket = socket.create_connection((host, port))
+        self.stream = self.socket.makefile("rb")
+        if session is None:
+            self.send({"op": "create", "layout": layout})
+        else:
+            self.send({"op": "join", "session": session})
+        reply = json.loads(self.stream.readline() or b"{}")
+        if reply.get("op") != "joined":
+            self.close()
+            raise ConnectionError(reply.get("message", "Connection refused"))
+        self.session = reply["session"]
+        self.color = reply["color"]
+        self.state = reply["state"]
+        self.ply = self.state["ply"]
+        self.thread = threading.Thread(target=self.listen, daemon=True)
+        self.thread.start()
+
+    ######### Methods #########
+    def send(self, message) -> None:
+        """Sends a message to the server."""
+        self.socket.sendall(encode(message))
+
+    def send_move(self, move) -> None:
+        """Sends a move (rules.Move) played on this side."""
+        self.send({"op": "move", "move": notation(move)})
+
+    def listen(self) -> None:
+        """Posts every message of the server as a NETWORK_EVENT (reader thread)."""
+        try:
+            for line in self.stream:
+                pg.event.post(pg.event.Event(NETWORK_EVENT, message=json.loads(line)))
+        except (OSError, ValueError):
+            pass
+        pg.event.post(pg.event.Event(NETWORK_EVENT, message={"op": "closed"}))
+
+    def load(self, board) -> None:
+        """Sets a Board to the position of the session when joining."""
+        state = self.state
+        replay = Replay(GameRecord(state["layout"], state["first"], state["moves"]))
+        replay.seek(board, len(replay))
+
+    def close(self) -> None:
+        """Disconnects from the server."""
+        try:
+            self.socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.socket.close()
+
+
+######### Load test #########
+async def open_session(host, port, message) -> tuple:
+    """Opens a connection sending a create or join request, returns (reader, writer, reply)."""
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(encode(message))
+    reply = json.loads(await reader.readline())
+    if reply.get("op") != "joined":
+        raise ConnectionError(reply.get("message"))
+    return reader, writer, reply
+
+async def play(host, port, plies, rng, latencies) -> None:
+    """Plays random moves on both sides of a new session, measuring the round trips."""
+    reader1, writer1, reply = await open_session(host, port, {"op": "create"})
+    reader2, writer2, _ = await open_session(
+        host, port, {"op": "join", "session": reply["session"]})
+    await reader1.readline() # Opponent joined
+    state = reply["state"]
+    cells = [int(value) for value in state["cells"]]
+    color = state["color"]
+    sides = {reply["color"]: (reader1, writer1), rules.enemy_of(reply["color"]): (reader2, writer2)}
+    for _ in range(plies):
+        moves = list(rules.legal_moves(cells, color))
+        if not moves:
+            break
+        reader, writer = sides[color]
+        start = perf_counter()
+        writer.write(encode({"op": "move", "move": notation(rng.choice(moves))}))
+        # Both players receive the diff
+        messages = [json.loads(await r.readline()) for r, _ in sides.values()]
+        latencies.append(perf_counter() - start)
+        moved = messages[0]
+        if moved["op"] != "moved":
+            raise RuntimeError(moved)
+        for cell, value in moved["changes"]:
+            cells[cell] = value
+        color = moved["color"]
+        if moved["winner"]:
+            break
+    for _, writer in sides.values():
+        writer.close()
+
+async def load_test(host, port, idle, active, plies, seed) -> str:
+    """
+    Opens idle sessions, then plays active games concurrently.
+
+    Returns
+    -------
+    str:
+        Client-side round trips and server-side statistics
+    """
+    rng = random.Random(seed)
+    idle_writers = []
+    for _ in range(idle):
+        _, writer, _ = await open_session(host, port, {"op": "create"})
+        idle_writers.append(writer)
+    latencies = []
+    start = perf_counter()
+    await asyncio.gather(*(
+        play(host, port, plies, random.Random(rng.getrandbits(32)), latencies)
+        for _ in range(active)
+    ))
+    elapsed = perf_counter() - start
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(encode({"op": "stats"}))
+    stats = json.loads(await reader.readline())
+    writer.close()
+    for idle_writer in idle_writers:
+        idle_writer.close()
+    latencies.sort()
+    lines = [
+        f"Sessions: {stats['sessions']} open, {active} played concurrently",
+        f"Moves: {len(latencies)} in {elapsed:.1f}s"
+        f" ({len(latencies) / elapsed if elapsed else 0:.0f} moves/s)",
+    ]
+    if latencies:
+        lines.append(
+            f"Round trip (ms): mean {statistics.fmean(latencies) * 1000:.2f}, "
+            f"p50 {latencies[len(latencies) // 2] * 1000:.2f}, "
+            f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f}")
+    server_latencies = stats.get("latency_ms", {})
+    if server_latencies:
+        lines.append("Server latency (ms): " + ", ".join(
+            f"{name} {value:.3f}" for name, value in server_latencies.items()))
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test of the Abalone server")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--idle", type=int, default=1000, help="sessions left idle")
+    parser.add_argument("--active", type=int, default=100, help="games played at once")
+    parser.add_argument("--plies", type=int, default=50, help="moves per game")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(asyncio.run(load_test(
+        args.host, args.port, args.idle, args.active, args.plies, args.seed)))
+
+if __name__ == "__main__":
+    main()
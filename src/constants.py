@@ -1,15 +1,12 @@
-"""Setup game settings and constants"""
+"""
+Setup game settings and constants.
+Importing this module does not initialize pygame: the images are only loaded
+the first time one of them is used (see load_assets), so that the rules and
+engines can run without a display.
+"""
 
 import os
-import pygame as pg
-import numpy as np
 from math import sqrt
-from pygame.locals import *
-
-pg.init()
-useless_screen = pg.display.set_mode()
-
-FONT = pg.font.SysFont("Calibri", 42)
 
 # Directories
 FILE_DIR = os.path.dirname(__file__)
@@ -31,58 +28,32 @@ GREEN2 = (39, 151, 0)
 GREEN3 = (102, 203, 112)
 ARROW_COLOR = (255, 0, 247)
 
-# Images (free to use)
+# Images (free to use), loaded by load_assets
 # https://www.iconshock.com/flat-icons/3d-graphics-icons/sphere-icon/
-MARBLE_RED = pg.image.load(
-    os.path.join(IMAGES_DIR, "marble_red.png")
-    ).convert_alpha()
-MARBLE_GREEN = pg.image.load(
-    os.path.join(IMAGES_DIR, "marble_green.png")
-    ).convert_alpha()
-MARBLE_PURPLE = pg.image.load(
-    os.path.join(IMAGES_DIR, "marble_purple.png")
-    ).convert_alpha()
-MARBLE_BLUE = pg.image.load(
-    os.path.join(IMAGES_DIR, "marble_blue.png")
-    ).convert_alpha()
-MARBLE_YELLOW = pg.image.load(
-    os.path.join(IMAGES_DIR, "marble_yellow.png")
-    ).convert_alpha()
-MARBLE_FREE = pg.image.load(
-    os.path.join(IMAGES_DIR, "marble_empty.png")
-    ).convert_alpha()
 # https://icons8.com/icon/54885/skull
-SKULL = pg.image.load(
-    os.path.join(IMAGES_DIR, "skull.png")
-).convert_alpha()
-SKULL = pg.transform.rotozoom(SKULL, 0, 0.7)  # Adjusting size
-# Dead marbles
-DEAD_BLUE = MARBLE_BLUE.copy()
-DEAD_BLUE.blit(SKULL, (8, 8))
-DEAD_YELLOW = MARBLE_YELLOW.copy()
-DEAD_YELLOW.blit(SKULL, (8, 8))
+IMAGE_FILES = {
+    "MARBLE_RED": "marble_red.png",
+    "MARBLE_GREEN": "marble_green.png",
+    "MARBLE_PURPLE": "marble_purple.png",
+    "MARBLE_BLUE": "marble_blue.png",
+    "MARBLE_YELLOW": "marble_yellow.png",
+    "MARBLE_FREE": "marble_empty.png",
+    "SKULL": "skull.png",
+}
+ASSETS = (*IMAGE_FILES, "DEAD_BLUE", "DEAD_YELLOW", "MARBLE_IMGS")
 
-MARBLE_SIZE = MARBLE_RED.get_rect().size[0] # All marbles have the same size
+MARBLE_SIZE = 60 # Size of the marble images (all marbles have the same size)
 MAX_DISTANCE_MARBLE = MARBLE_SIZE*sqrt(1.25) # Max distance between two neighbouring marbles (diagonal)
 
-
-
 # Window size
 WIDTH = 900
 FIRST_X = WIDTH*0.6 - MARBLE_SIZE*2.5 
 FIRST_Y = 65 # Defines window's height
 HEIGHT = FIRST_Y*2 + MARBLE_SIZE*9
 
-# Keys are arbitrary chosen
-MARBLE_IMGS = {
-    -2: DEAD_BLUE,
-    -3: DEAD_YELLOW,
-    1: MARBLE_FREE, 
-    2: MARBLE_BLUE, 
-    3: MARBLE_YELLOW,
-}
-
 # Texts
+FONT_NAME = "Calibri"
+TEXT_CACHE_SIZE = 64 # Number of rendered texts kept in memory
 # Current Player Blue
 CURRENT_PLAYERB_TXT = "Playing: Blue"
 CURRENT_PLAYERB_FONT_SIZE = 35
@@ -149,6 +120,21 @@ WRONG_MOVE = [
     WRONG_MOVE_COLOR,
     WRONG_MOVE_POSITION
 ]
+# Computer thinking
+COMPUTER_THINKING_TXT = "Computer is thinking..."
+COMPUTER_THINKING_FONT_SIZE = 35
+COMPUTER_THINKING_COLOR = GREY
+COMPUTER_THINKING_POSITION = CONFIRM_MOVE_POSITION
+COMPUTER_THINKING = [
+    COMPUTER_THINKING_TXT,
+    COMPUTER_THINKING_FONT_SIZE,
+    COMPUTER_THINKING_COLOR,
+    COMPUTER_THINKING_POSITION
+]
+# Profiler (see profiler.py)
+PROFILER_FONT_SIZE = 22
+PROFILER_COLOR = GREY
+PROFILER_POSITION = WIDTH*0.6, FIRST_Y*0.15
 # Reset Game
 RESET_GAME_TXT = "Reset Game [r]"
 RESET_GAME_FONT_SIZE = 30
@@ -172,6 +158,13 @@ QUIT_GAME = [
     QUIT_GAME_POSITION 
 ]
 
+# Game loop
+FPS = 60 # Maximum redraws per second while animating (0: uncapped)
+EVENT_DRIVEN = True # Sleep until the next event while nothing moves
+
+# Computer opponent
+COMPUTER_TIME = 2.0 # Time budget per move (seconds)
+
 # Deadzones
 # Position
 FIRST_DZ_X = 70
@@ -196,92 +189,45 @@ YELLOW_DEADZONE = {
     (FIRST_DZ_X + MARBLE_SIZE*2, FIRST_YDZ_Y + MARBLE_SIZE*2): 1,
 }
 
-# Initial Configurations
-STANDARD = [
-    [2, 2, 2, 2, 2],
-    [2, 2, 2, 2, 2, 2],
-    [1, 1, 2, 2, 2, 1, 1],
-    [1, 1, 1, 1, 1, 1, 1, 1],
-    [1, 1, 1, 1, 1, 1, 1, 1, 1],
-    [1, 1, 1, 1, 1, 1, 1, 1],
-    [1, 1, 3, 3, 3, 1, 1],
-    [3, 3, 3, 3, 3, 3],
-    [3, 3, 3, 3, 3],
-]
-GERMAN_DAISY = (
-    [1, 1, 1, 1, 1],
-    [2, 2, 1, 1, 3, 3],
-    [2, 2, 2, 1, 3, 3, 3],
-    [1, 2, 2, 1, 1, 3, 3, 1],
-    [1, 1, 1, 1, 1, 1, 1, 1, 1],
-    [1, 3, 3, 1, 1, 2, 2, 1],
-    [3, 3, 3, 1, 2, 2, 2],
-    [3, 3, 1, 1, 2, 2],
-    [1, 1, 1, 1, 1],
-)
-BELGIAN_DAISY = (
-    [2, 2, 1, 3, 3],
-    [2, 2, 2, 3, 3, 3],
-    [1, 2, 2, 1, 3, 3, 1],
-    [1, 1, 1, 1, 1, 1, 1, 1],
-    [1, 1, 1, 1, 1, 1, 1, 1, 1],
-    [1, 1, 1, 1, 1, 1, 1, 1],
-    [1, 3, 3, 1, 2, 2, 1],
-    [3, 3, 3, 2, 2, 2],
-    [3, 3, 1, 2, 2],
-)
-DUTCH_DAISY = (
-    [2, 2, 1, 3, 3],
-    [2, 3, 2, 3, 2, 3],
-    [1, 2, 2, 1, 3, 3, 1],
-    [1, 1, 1, 1, 1, 1, 1, 1],
-    [1, 1, 1, 1, 1, 1, 1, 1, 1],
-    [1, 1, 1, 1, 1, 1, 1, 1],
-    [1, 3, 3, 1, 2, 2, 1],
-    [3, 2, 3, 2, 3, 2],
-    [3, 3, 1, 2, 2],
-)
-SWISS_DAISY = (
-    [1, 1, 1, 1, 1],
-    [2, 2, 1, 1, 3, 3],
-    [2, 3, 2, 1, 3, 2, 3],
-    [1, 2, 2, 1, 1, 3, 3, 1],
-    [1, 1, 1, 1, 1, 1, 1, 1, 1],
-    [1, 3, 3, 1, 1, 2, 2, 1],
-    [3, 2, 3, 1, 2, 3, 2],
-    [3, 3, 1, 1, 2, 2],
-    [1, 1, 1, 1, 1],
-)
-DOMINATION = (
-    [1, 1, 1, 1, 1],
-    [2, 1, 1, 1, 1, 3],
-    [2, 2, 1, 1, 1, 3, 3],
-    [2, 2, 2, 2, 1, 3, 3, 3],
-    [1, 1, 1, 3, 1, 3, 1, 1, 1],
-    [3, 3, 3, 1, 2, 2, 2, 2],
-    [3, 3, 1, 1, 1, 2, 2],
-    [3, 1, 1, 1, 1, 2],
-    [1, 1, 1, 1, 1],
-)
-PYRAMID = (
-    [2, 1, 1, 1, 1],
-    [2, 2, 1, 1, 1, 1],
-    [2, 2, 2, 1, 1, 1, 1],
-    [2, 2, 2, 2, 1, 1, 1, 1],
-    [2, 2, 2, 2, 1, 3, 3, 3, 3],
-    [1, 1, 1, 1, 3, 3, 3, 3],
-    [1, 1, 1, 1, 3, 3, 3],
-    [1, 1, 1, 1, 3, 3],
-    [1, 1, 1, 1, 3],
-)
-THE_WALL = (
-    [1, 1, 2, 1, 1],
-    [1, 1, 1, 1, 1, 1],
-    [1, 2, 2, 2, 2, 2, 1],
-    [2, 2, 2, 2, 2, 2, 2, 2],
-    [1, 1, 1, 1, 1, 1, 1, 1, 1],
-    [3, 3, 3, 3, 3, 3, 3, 3],
-    [1, 3, 3, 3, 3, 3, 1],
-    [1, 1, 1, 1, 1, 1],
-    [1, 1, 3, 1, 1],
-)
+# Initial Configurations (see layouts.py)
+from layouts import (
+    STANDARD, GERMAN_DAISY, BELGIAN_DAISY, DUTCH_DAISY, SWISS_DAISY,
+    DOMINATION, PYRAMID, THE_WALL, LAYOUTS)
+
+
+def load_assets() -> None:
+    """
+    Loads the images (MARBLE_RED, ..., DEAD_BLUE, DEAD_YELLOW and MARBLE_IMGS).
+    Called by the game once its window is opened, so that the images are
+    converted to the display's pixel format. Otherwise, the first access
+    to one of them loads them without conversion.
+    """
+    import pygame as pg
+    images = {
+        name: pg.image.load(os.path.join(IMAGES_DIR, file_name))
+        for name, file_name in IMAGE_FILES.items()
+    }
+    if pg.display.get_surface() is not None:
+        images = {name: image.convert_alpha() for name, image in images.items()}
+    images["SKULL"] = pg.transform.rotozoom(images["SKULL"], 0, 0.7) # Adjusting size
+    # Dead marbles
+    images["DEAD_BLUE"] = images["MARBLE_BLUE"].copy()
+    images["DEAD_BLUE"].blit(images["SKULL"], (8, 8))
+    images["DEAD_YELLOW"] = images["MARBLE_YELLOW"].copy()
+    images["DEAD_YELLOW"].blit(images["SKULL"], (8, 8))
+    # Keys are arbitrary chosen
+    images["MARBLE_IMGS"] = {
+        -2: images["DEAD_BLUE"],
+        -3: images["DEAD_YELLOW"],
+        1: images["MARBLE_FREE"],
+        2: images["MARBLE_BLUE"],
+        3: images["MARBLE_YELLOW"],
+    }
+    globals().update(images)
+
+def __getattr__(name):
+    """Loads the images the first time one of them is accessed."""
+    if name in ASSETS:
+        load_assets()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -6,9 +6,14 @@ for better readability.
 
 import pygame as pg
 import constants as const
+from collections import OrderedDict
 from pygame import gfxdraw
 
-pg.init()
+# Fonts by size, and rendered texts by (text, size, color), least recently used first
+FONTS = {}
+TEXTS = OrderedDict()
+# Pre-composited board (background, marbles and deadzones), see board_layer
+LAYER = {"key": None, "surface": None}
 
 def overall_display(screen, board, game_over, valid_move) -> None:
     """
@@ -25,19 +30,41 @@ def overall_display(screen, board, game_over, valid_move) -> None:
     valid_move: bool (required)
         True if a valid move has been performed, False otherwise
     """
-    screen.fill(const.BACKGROUND)
+    screen.blit(board_layer(screen, board), (0, 0))
     message(screen, *const.RESET_GAME)
     message(screen, *const.QUIT_GAME)
-    display_marbles(screen, board)
     display_new_colors(screen, board)
     display_dead_marble(screen, board) 
-    display_deadzones(screen, board) 
     display_infos_move(screen, board, valid_move)
     if not game_over:
         display_player(screen, board)
     if game_over:
         display_winner(screen, game_over)
 
+def board_layer(screen, board) -> pg.Surface:
+    """
+    Returns the board without its overlays: background, marbles and deadzones.
+    The surface is cached and only rebuilt when the position changes
+    (see Board.version), so that its cost does not depend on the marbles.
+
+    Parameters
+    ----------
+    screen: pygame.Surface (required)
+        Game window (defines the size and pixel format of the layer)
+    board: Board (required)
+        Abalone board
+    """
+    key = id(board), board.version
+    layer = LAYER["surface"]
+    if LAYER["key"] != key or layer.get_size() != screen.get_size():
+        if layer is None or layer.get_size() != screen.get_size():
+            layer = LAYER["surface"] = screen.copy()
+        layer.fill(const.BACKGROUND)
+        display_marbles(layer, board)
+        display_deadzones(layer, board)
+        LAYER["key"] = key
+    return layer
+
 def message(screen, msg, font_size, color, position) -> None:
     """
     Displays a message on screen.
@@ -53,10 +80,39 @@ def message(screen, msg, font_size, color, position) -> None:
     position: tuple of int (required)
         Position on screen
     """ 
-    font = pg.font.SysFont("Calibri", font_size)
-    text = font.render(msg, True, color)
-    text_rect = text.get_rect(topleft=(position))
-    screen.blit(text, text_rect)
+    text = render_text(msg, font_size, color)
+    screen.blit(text, text.get_rect(topleft=(position)))
+
+def get_font(font_size) -> pg.font.Font:
+    """Returns the font of a given size, looked up only once per size."""
+    font = FONTS.get(font_size)
+    if font is None:
+        font = FONTS[font_size] = pg.font.SysFont(const.FONT_NAME, font_size)
+    return font
+
+def render_text(msg, font_size, color) -> pg.Surface:
+    """
+    Returns a rendered text. The last const.TEXT_CACHE_SIZE texts are kept,
+    so that a text displayed every frame is only rendered once.
+
+    Parameters
+    ----------
+    msg: string (required)
+        Actual text to be rendered
+    font_size: int (required)
+        Font size
+    color: tuple of int (required)
+        Text RGB color code
+    """
+    key = msg, font_size, tuple(color)
+    text = TEXTS.get(key)
+    if text is None:
+        text = TEXTS[key] = get_font(font_size).render(msg, True, color)
+        if len(TEXTS) > const.TEXT_CACHE_SIZE:
+            TEXTS.popitem(last=False)
+    else:
+        TEXTS.move_to_end(key)
+    return text
 
 def display_marbles(screen, board) -> None:
     """
@@ -208,4 +264,187 @@ def draw_path(start, end, screen, color, width) -> None:
     gfxdraw.filled_circle(screen, x1, y1, width + 1, color)
     gfxdraw.aacircle(screen, x2, y2, width + 1, color)
     gfxdraw.filled_circle(screen, x2, y2, width + 1, color)
-    
\ No newline at end of file
+    
+def hud_messages(board, game_over, valid_move) -> list:
+    """
+    Returns the messages displayed around the board (see overall_display).
+
+    Parameters
+    ----------
+    board: Board (required)
+        Abalone board
+    game_over: bool (required)
+        True if the game has ended, False otherwise
+    valid_move: bool (required)
+        True if a valid move has been performed, False otherwise
+    Returns
+    -------
+    list:
+        Messages as defined in constants.py (text, size, color, position)
+    """
+    messages = [const.RESET_GAME, const.QUIT_GAME]
+    if valid_move and board.new_marbles:
+        messages.append(const.CONFIRM_MOVE)
+    if const.MARBLE_RED in board.new_colors.values():
+        messages.append(const.WRONG_MOVE)
+    if not game_over:
+        if board.current_color == 2:
+            messages.append(const.CURRENT_PLAYERB)
+        else:
+            messages.append(const.CURRENT_PLAYERY)
+    elif game_over == 2:
+        messages.append(const.BLUE_WINS)
+    elif game_over == 3:
+        messages.append(const.YELLOW_WINS)
+    return messages
+
+def merge_rects(rects) -> list:
+    """Merges overlapping rects so that no region is drawn twice."""
+    merged = []
+    for rect in rects:
+        rect = pg.Rect(rect)
+        i = rect.collidelist(merged)
+        while i != -1:
+            rect.union_ip(merged.pop(i))
+            i = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
+
+
+class Renderer:
+    """
+    Dirty-rectangle renderer of the game window.
+    The board itself comes from the cached layer (see board_layer): when the
+    position changes, only the cells and deadzone slots whose value changed
+    are redrawn. Every frame, the overlays (changing colors, dead marble,
+    messages and dragged marble) are compared with the previous ones and only
+    the regions whose content changed are redrawn.
+    Only these regions have to be updated on screen.
+
+    Parameter
+    ---------
+    board: Board (required)
+        Abalone board, only used to compute the marbles' positions
+    """
+
+    ######### Constructor #########
+    def __init__(self, board):
+        size = const.MARBLE_SIZE
+        self.cell_rects = {}
+        for i_r, r in enumerate(board.data):
+            for i_c in range(len(r)):
+                rect = pg.Rect(0, 0, size, size)
+                rect.center = board.get_center((i_r, i_c))
+                self.cell_rects[i_r, i_c] = rect
+        self.scene = {}
+        self.layer_key = None
+        self.layer_items = {}
+        self.full_redraw = True
+
+    ######### Methods #########
+    def invalidate(self) -> None:
+        """Forces the next frame to be entirely redrawn."""
+        self.full_redraw = True
+
+    def layer_changes(self, board) -> list:
+        """Returns the rects of the layer's cells and deadzone slots that changed."""
+        key = id(board), board.version
+        if key == self.layer_key:
+            return []
+        self.layer_key = key
+        items = {}
+        for i_r, r in enumerate(board.data):
+            for i_c, value in enumerate(r):
+                items["cell", i_r, i_c] = value, self.cell_rects[i_r, i_c]
+        size = const.MARBLE_SIZE
+        for pos, value in (*board.blue_deadzone.items(), *board.yellow_deadzone.items()):
+            items["deadzone", pos] = value, pg.Rect(pos, (size, size))
+        previous = self.layer_items
+        self.layer_items = items
+        return [
+            rect for key, (value, rect) in items.items()
+            if key not in previous or previous[key][0] != value
+        ]
+
+    def build_scene(self, board, game_over, valid_move, drag, extra) -> dict:
+        """
+        Lists the overlays drawn on top of the board layer, in drawing order.
+        See self.draw for the parameters.
+
+        Returns
+        -------
+        dict:
+            keys: tuple identifying an item, values: (surface, rect)
+        """
+        scene = {}
+        imgs = const.MARBLE_IMGS
+        for i, spec in enumerate((const.RESET_GAME, const.QUIT_GAME)):
+            text = render_text(*spec[:3])
+            scene["message", i] = text, text.get_rect(topleft=spec[3])
+        for loc, color in board.new_colors.items():
+            scene["color", loc] = color, self.cell_rects[loc]
+        if board.buffer_dead_marble:
+            pos, value = next(iter(board.buffer_dead_marble.items()))
+            scene["dead",] = imgs[value], imgs[value].get_rect(center=pos)
+        messages = hud_messages(board, game_over, valid_move)[2:] + list(extra)
+        for i, (msg, font_size, color, position) in enumerate(messages, 2):
+            text = render_text(msg, font_size, color)
+            scene["message", i] = text, text.get_rect(topleft=position)
+        if drag is not None:
+            pick, moving_marble = drag
+            scene["drag origin",] = const.MARBLE_FREE, self.cell_rects[pick]
+            scene["drag",] = imgs[board.get_value(pick)], pg.Rect(moving_marble)
+        return scene
+
+    def draw(self, screen, board, game_over, valid_move, drag=None, extra=()) -> list:
+        """
+        Redraws the regions of the window that changed since the last frame.
+
+        Parameters
+        ----------
+        screen: pygame.Surface (required)
+            Game window
+        board: Board (required)
+            Abalone board
+        game_over: bool (required)
+            True if the game has ended, False otherwise
+        valid_move: bool (required)
+            True if a valid move has been performed, False otherwise
+        drag: tuple (optional, default=None)
+            (location of the picked marble, rect of the dragged marble) when dragging
+        extra: list (optional, default=())
+            Additional messages (text, size, color, position)
+        Returns
+        -------
+        list:
+            Rects to be passed to pygame.display.update
+        """
+        layer = board_layer(screen, board)
+        dirty = self.layer_changes(board)
+        scene = self.build_scene(board, game_over, valid_move, drag, extra)
+        if self.full_redraw:
+            self.full_redraw = False
+            dirty = [screen.get_rect()]
+        else:
+            previous = self.scene
+            for key, (surface, rect) in scene.items():
+                old = previous.get(key)
+                if old is None:
+                    dirty.append(rect)
+                elif old[0] is not surface or old[1] != rect:
+                    dirty.append(old[1])
+                    dirty.append(rect)
+            dirty.extend(rect for key, (_, rect) in previous.items() if key not in scene)
+        self.scene = scene
+        if not dirty:
+            return dirty
+        dirty = merge_rects(dirty)
+        items = list(scene.values())
+        for area in dirty:
+            screen.set_clip(area)
+            screen.blit(layer, area, area)
+            for surface, rect in items:
+                if rect.colliderect(area):
+                    screen.blit(surface, rect)
+        screen.set_clip(None)
+        return dirty
@@ -0,0 +1,265 @@
+"""
+Computer opponent: iterative-deepening alpha-beta (negamax) search on bitboards.
+Moves are ordered by transposition table move, ejections, sumitos, killer moves
+and history heuristic. The search stops as soon as its time budget is spent
+and plays the best move of the last completed iteration.
+"""
+
+from time import perf_counter
+
+import rules
+from bitboard import BIT, SHIFTS, shift
+from zobrist import TranspositionTable
+
+# Scores
+WIN = 1_000_000
+CAPTURE = 1000
+CENTRE = 12 # Per marble and per ring closer to the centre
+COHESION = 3 # Per pair of neighbouring friendly marbles
+EDGE = 4 # Per side of a marble facing the outside of the board
+
+# Cells grouped by their distance to the centre of the board (0 to 4)
+_CENTRE_Q, _CENTRE_R = 0, 4
+RINGS = [0] * 5
+for _i, (_q, _r) in enumerate(rules.AXIAL):
+    _dq, _dr = _q - _CENTRE_Q, _r - _CENTRE_R
+    RINGS[(abs(_dq) + abs(_dr) + abs(_dq + _dr)) // 2] |= BIT[_i]
+RINGS = tuple(RINGS)
+# EXPOSED[k]: cells having k sides facing the outside of the board (0 to 3)
+EXPOSED = [0] * 4
+for _i, _neighbours in enumerate(rules.NEIGHBOURS):
+    EXPOSED[_neighbours.count(rules.OFF)] |= BIT[_i]
+EXPOSED = tuple(EXPOSED)
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget is spent."""
+
+
+def popcount(mask) -> int:
+    """Returns the number of bits set in a mask."""
+    return bin(mask).count("1")
+
+def evaluate(position) -> int:
+    """
+    Static evaluation of a position, from the point of view of the color to play.
+    It combines the difference of ejected marbles, how close the marbles are
+    from the centre, how many friendly marbles are neighbours and how many
+    sides of the marbles face the outside of the board.
+
+    Parameter
+    ---------
+    position: Bitboard (required)
+        Position to be evaluated
+    Returns
+    -------
+    int:
+        Score, positive if the color to play is better
+    """
+    blue, yellow = position.blue, position.yellow
+    score = CAPTURE * (position.blue_score - position.yellow_score)
+    for k, ring in enumerate(RINGS):
+        score += CENTRE * (4 - k) * (popcount(blue & ring) - popcount(yellow & ring))
+    for s in SHIFTS[:3]:
+        score += COHESION * (
+            popcount(blue & shift(blue, s)) - popcount(yellow & shift(yellow, s)))
+    for k, exposed in enumerate(EXPOSED):
+        score -= EDGE * k * (popcount(blue & exposed) - popcount(yellow & exposed))
+    return score if position.color == rules.BLUE else -score
+
+
+class Engine:
+    """
+    A class used to search the best move of a position within a time budget.
+
+    Parameters
+    ----------
+    time_limit: float (optional, default=2.0)
+        Time budget per move (seconds)
+    max_depth: int (optional, default=32)
+        Maximum depth of the iterative deepening
+    tt_bytes: int (optional, default=32 MiB)
+        Memory cap of the transposition table
+    books: list of book.Book (optional, default=())
+        Opening books probed before searching (see book.py)
+    Attributes
+    ----------
+    nodes: int
+        Number of nodes visited by the last search
+    depth: int
+        Depth of the last completed iteration of the last search
+        (depth of the book search if the move was found in a book)
+    score: int
+        Score of the best move found by the last search
+    """
+
+    ######### Constructor #########
+    def __init__(self, time_limit=2.0, max_depth=32, tt_bytes=32 * 2**20, books=()):
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.books = list(books)
+        self.table = TranspositionTable(tt_bytes)
+        self.history = {}
+        self.killers = []
+        self.nodes = 0
+        self.depth = 0
+        self.score = 0
+        self.deadline = 0.0
+
+    ######### Methods #########
+    def search(self, position):
+        """
+        Searches the best move of a position, or plays the book move if any.
+
+        Parameter
+        ---------
+        position: Bitboard (required)
+            Position to be searched (left untouched)
+        Returns
+        -------
+        tuple if the color to play has a legal move
+            Bitboard move
+        None otherwise
+        """
+        start = perf_counter()
+        self.deadline = start + self.time_limit
+        self.table.new_search()
+        self.history.clear()
+        self.killers = [[None, None] for _ in range(self.max_depth + 1)]
+        self.nodes = 0
+        self.depth = 0
+        for book in self.books:
+            entry = book.probe(position)
+            if entry is not None:
+                move, self.score, self.depth = entry
+                return move
+        position = position.copy()
+        moves = self.order(position.legal_moves(), None, 0)
+        if not moves:
+            return None
+        best_move, self.score = moves[0], 0
+        for depth in range(1, self.max_depth + 1):
+            try:
+                move, score = self.search_root(position, moves, depth)
+            except SearchTimeout:
+                break
+            best_move, self.score, self.depth = move, score, depth
+            # The best move is searched first during the next iteration
+            moves.remove(move)
+            moves.insert(0, move)
+            if abs(score) >= WIN - self.max_depth:
+                break
+            # The next iteration would most likely not complete
+            if perf_counter() - start > self.time_limit * 0.5:
+                break
+        return best_move
+
+    def search_root(self, position, moves, depth) -> tuple:
+        """Searches every root move at a given depth, returns (best move, score)."""
+        alpha, beta = -WIN - 1, WIN + 1
+        best_move = moves[0]
+        for move in moves:
+            position.make(move)
+            score = -self.negamax(position, depth - 1, -beta, -alpha, 1)
+            position.unmake(move)
+            if score > alpha:
+                alpha, best_move = score, move
+        self.table.store(
+            position.zobrist, depth, TranspositionTable.EXACT, alpha, best_move)
+        return best_move, alpha
+
+    def negamax(self, position, depth, alpha, beta, ply) -> int:
+        """
+        Alpha-beta search of a position.
+
+        Parameters
+        ----------
+        position: Bitboard (required)
+            Position to be searched, modified in place and restored
+        depth: int (required)
+            Remaining depth
+        alpha: int (required)
+            Lower bound of the search window
+        beta: int (required)
+            Upper bound of the search window
+        ply: int (required)
+            Distance to the root
+        Returns
+        -------
+        int:
+            Score from the point of view of the color to play
+        """
+        self.nodes += 1
+        if not self.nodes & 255 and perf_counter() > self.deadline:
+            raise SearchTimeout
+        # The previous move won the game
+        if position.check_win():
+            return -WIN + ply
+        if depth == 0:
+            return evaluate(position)
+        alpha_orig = alpha
+        table = self.table
+        key = position.zobrist
+        entry = table.probe(key)
+        tt_move = None
+        if entry is not None:
+            tt_depth, bound, value, tt_move = entry
+            if tt_depth >= depth:
+                if bound == TranspositionTable.EXACT:
+                    return value
+                if bound == TranspositionTable.LOWER:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value
+        moves = self.order(position.legal_moves(), tt_move, ply)
+        if not moves:
+            return evaluate(position)
+        best, best_move = -WIN - 1, moves[0]
+        for move in moves:
+            position.make(move)
+            score = -self.negamax(position, depth - 1, -beta, -alpha, ply + 1)
+            position.unmake(move)
+            if score > best:
+                best, best_move = score, move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        # Quiet moves causing a cutoff are remembered
+                        if not move[1]:
+                            killers = self.killers[ply]
+                            if killers[0] != move:
+                                killers[1], killers[0] = killers[0], move
+                            self.history[move] = self.history.get(move, 0) + depth*depth
+                        break
+        if best <= alpha_orig:
+            bound = TranspositionTable.UPPER
+        elif best >= beta:
+            bound = TranspositionTable.LOWER
+        else:
+            bound = TranspositionTable.EXACT
+        table.store(key, depth, bound, best, best_move)
+        return best
+
+    def order(self, moves, tt_move, ply) -> list:
+        """
+        Sorts moves from the most to the least promising: transposition table move,
+        ejections, sumitos, killer moves, then the others by history score.
+        """
+        killers = self.killers[ply] if ply < len(self.killers) else (None, None)
+        history = self.history
+
+        def priority(move):
+            if move == tt_move:
+                return 4 << 40
+            if move[2]:
+                return 3 << 40
+            if move[1]:
+                return 2 << 40
+            if move == killers[0] or move == killers[1]:
+                return 1 << 40
+            return history.get(move, 0)
+
+        moves.sort(key=priority, reverse=True)
+        return moves
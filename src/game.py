@@ -1,5 +1,6 @@
 import sys
 import os
+import argparse
 
 from os.path import (join, dirname, abspath)
 # Manually places the window
@@ -9,33 +10,153 @@ sys.path.insert(0, abspath(join(dirname(__file__), "src")))
 import pygame as pg
 import constants as const
 import display as dsp
+import rules
 from board import Board
+from client import NETWORK_EVENT, RemoteGame
+from book import open_books
+from engine import Engine
+from profiler import Profiler
+from recorder import Recorder
+from records import GameRecord, Replay, parse_move
 
 SNAP_FOLDER = os.path.join(os.path.dirname(__file__), "snapshots")
-n_snap = 0
 
 # Game loop
-def main():
-    """Implements the game loop and handles the user's events"""
+def main(computer=None, think_time=const.COMPUTER_TIME, fps=const.FPS,
+         event_driven=const.EVENT_DRIVEN, record=None, load_game=None, save_game=None,
+         connect=None, session=None, profile=None):
+    """
+    Implements the game loop and handles the user's events.
+    In event-driven mode, the loop sleeps until the next event while nothing
+    moves on screen, and redraws at most fps times per second otherwise
+    (dragging a marble, recording).
+
+    Parameters
+    ----------
+    computer: int (optional, default=None)
+        Color played by the computer (2: blue, 3: yellow), None for player versus player
+    think_time: float (optional, default=COMPUTER_TIME)
+        Computer's time budget per move (seconds)
+    fps: int (optional, default=FPS)
+        Maximum redraws per second (0: uncapped)
+    event_driven: bool (optional, default=EVENT_DRIVEN)
+        Sleeps until the next event while idle, redraws continuously otherwise
+    record: str (optional, default=None)
+        Records every frame to SNAP_FOLDER, "png" (one file per frame) or
+        "raw" (single compressed stream, see recorder.py), None to disable
+    load_game: str (optional, default=None)
+        Game record (see records.py) to be continued
+    save_game: str (optional, default=None)
+        File where the game record is written when quitting
+    connect: str (optional, default=None)
+        "host:port" of a server (see server.py) to play against a remote player.
+        The computer, if any, then plays the local side
+    session: str (optional, default=None)
+        Session of the server to be joined, None to create a new one
+    profile: str (optional, default=None)
+        File where the frame timings are written when quitting (see profiler.py),
+        None to disable the profiler and its on-screen frame rate
+    """
     pg.init()
     screen = pg.display.set_mode([const.WIDTH, const.HEIGHT])
+    const.load_assets()
     pg.display.set_caption("Abalon3")
     board = Board()
-    record = False
+    if load_game:
+        replay = Replay(GameRecord.load(load_game))
+        replay.seek(board, len(replay))
+    remote = None
+    if connect:
+        host, _, port = connect.rpartition(":")
+        remote = RemoteGame(host, int(port), session)
+        remote.load(board)
+        if computer is not None:
+            computer = remote.color
+        color_name = "blue" if remote.color == 2 else "yellow"
+        pg.display.set_caption(f"Abalon3 - session {remote.session} ({color_name})")
+    renderer = dsp.Renderer(board)
+    engine = Engine(think_time, books=open_books())
+    clock = pg.time.Clock()
+    recorder = Recorder(SNAP_FOLDER, record) if record else None
+    profiler = Profiler(enabled=profile is not None)
+    profiler.instrument(dsp)
+    profiler.instrument(dsp.Renderer, ["layer_changes", "build_scene"])
+    profiler.instrument(Board, ["push_marble", "new_range", "select_range", "get_move_index"])
     running = True
     moving = False
-    game_over = False
+    game_over = board.check_win()
     valid_move = False
 
     while running:
-        # Events handling
-        for event in pg.event.get():
+        # Overall display (only the regions that changed),
+        # including the moving selected marble
+        drag = (pick, moving_marble) if moving else None
+        profiler.start("draw")
+        dirty = renderer.draw(screen, board, game_over, valid_move, drag, profiler.overlay())
+        profiler.stop("draw")
+        if recorder:
+            profiler.start("record")
+            recorder.capture(screen)
+            profiler.stop("record")
+        # Updating screen
+        profiler.start("display update")
+        pg.display.update(dirty)
+        profiler.stop("display update")
+        profiler.end_frame()
+        # Computer's turn, never waiting for an event
+        if board.current_color == computer and not game_over and not moving:
+            dirty = renderer.draw(
+                screen, board, game_over, valid_move, extra=[const.COMPUTER_THINKING])
+            pg.display.update(dirty)
+            position = board.to_bitboard()
+            profiler.start("search")
+            move = engine.search(position)
+            profiler.stop("search")
+            if move is not None:
+                move = position.to_move(move)
+                if remote:
+                    remote.send_move(move)
+                board.play(move)
+            game_over = board.check_win()
+            valid_move = False
+            continue
+        # Events handling, sleeping until the next one if nothing moves
+        if moving or recorder or not event_driven:
+            clock.tick(fps)
+            events = pg.event.get()
+        else:
+            events = [pg.event.wait()] + pg.event.get()
+        profiler.start("events")
+        for event in events:
             mouse = pg.mouse.get_pos()
             p_keys = pg.key.get_pressed()
             p_mouse = pg.mouse.get_pressed()
             # Quiting game
             if event.type == pg.QUIT:
                 running = False
+            # Window uncovered or restored, its content may be lost
+            elif event.type in (pg.VIDEOEXPOSE, pg.WINDOWEXPOSED):
+                renderer.invalidate()
+            # Message of the server, the own moves being already played
+            elif event.type == NETWORK_EVENT:
+                message = event.message
+                if message["op"] == "moved":
+                    remote.ply = message["ply"]
+                    if message["ply"] > len(board.moves):
+                        moving = valid_move = False
+                        board.play(parse_move(
+                            message["move"], rules.flatten(board.data), board.current_color))
+                        game_over = board.check_win()
+                elif message["op"] in ("opponent", "left", "closed"):
+                    print(f"Server: {message}")
+                # The moves rejected by the server are taken back to stay in sync
+                elif message["op"] == "error":
+                    print(f"Server: {message}")
+                    while len(board.moves) > remote.ply and board.undo():
+                        pass
+                    board.redo_stack.clear()
+                    moving = valid_move = False
+                    game_over = board.check_win()
             elif event.type == pg.KEYDOWN:
                 # Quiting game with q
                 if event.key == pg.K_q:
@@ -43,14 +164,24 @@ def main():
                 # Confirming move and possible update
                 elif event.key == pg.K_SPACE:
                     moving = False
-                    if valid_move:
+                    if valid_move and board.buffer_move is not None:
+                        if remote:
+                            remote.send_move(board.buffer_move)
                         board.update()
+                        valid_move = False
                     game_over = board.check_win()
                     board.clear_buffers()
-                # Resetting game
-                elif event.key == pg.K_r:
+                # Resetting game (not when playing remotely)
+                elif event.key == pg.K_r and not remote:
                     board.reset()
                     game_over = False
+                # Undoing and redoing moves, back to the player's turn against the computer
+                elif event.key in (pg.K_u, pg.K_y) and not remote:
+                    step = board.undo if event.key == pg.K_u else board.redo
+                    while step() and board.current_color == computer:
+                        pass
+                    moving = valid_move = False
+                    game_over = board.check_win()
             # Selecting a single marble
             if not game_over:
                 if event.type == pg.MOUSEBUTTONDOWN and not p_keys[pg.K_LSHIFT]:
@@ -59,66 +190,77 @@ def main():
                     # Cant be out of bounds or must be current color
                     if not pick or pick and board.get_value(pick) != board.current_color:
                         continue
+                    # Remote players move their own marbles
+                    if remote and board.current_color != remote.color:
+                        continue
                     # Move is valid, getting marble's data
                     moving = True
-                    pick_center = board.get_center(pick)
+                    hover = None
                     moving_marble = const.MARBLE_IMGS[board.get_value(pick)].get_rect()
-                    moving_marble.center = pick_center
+                    moving_marble.center = board.get_center(pick)
                 # Releasing selection
                 elif event.type == pg.MOUSEBUTTONUP:
-                    moving = False
+                    moving = valid_move = False
                     board.clear_buffers()
                 # Moving single marble
                 elif event.type == pg.MOUSEMOTION and moving:
-                    valid_move = False
                     moving_marble.move_ip(event.rel)
                     target = board.normalize_coordinates(mouse)
+                    if target == hover:
+                        continue # Still over the same spot, the feedback is unchanged
+                    hover = target
+                    valid_move = False
                     if not target:
                         continue # User's target is invalid (out of bounds)
                     # Valid target otherwise
-                    target_center = board.get_center(target)
-                    d = board.distance(pick_center, target_center)
                     # the target must be in the pick's neighborhood and cannot be the pick itself
-                    if d <= const.MAX_DISTANCE_MARBLE and target != pick:
+                    if rules.direction(rules.INDEX[pick], rules.INDEX[target]) is not None:
                         valid_move = board.push_marble(pick, target)
                 # Moving multiple marbles
                 elif p_keys[pg.K_LSHIFT] and p_mouse[0]:
                     pick = board.normalize_coordinates(mouse)
-                    if not pick:
+                    if not pick or remote and board.current_color != remote.color:
                         continue
                     value = board.get_value(pick)
-                    centers = board.select_range(pick, value)
-                    if centers:
-                        valid_move = board.new_range(pick, centers)
-        # Overall display
-        dsp.overall_display(screen, board, game_over, valid_move)
-        # Displaying the moving selected marble
-        if moving: 
-            origin_center = board.get_center(pick)
-            rect_free = const.MARBLE_FREE.get_rect()
-            rect_free.center = origin_center
-            screen.blit(const.MARBLE_FREE, rect_free)
-            screen.blit(const.MARBLE_IMGS[board.get_value(pick)], moving_marble)
-        if record:
-            record_game(screen)
-        # Updating screen
-        pg.display.update()
+                    selection = board.select_range(pick, value)
+                    if selection:
+                        valid_move = board.new_range(pick, selection)
+        profiler.stop("events")
+    if recorder:
+        print(recorder.close())
+    if save_game:
+        GameRecord.from_board(board).save(save_game)
+    if remote:
+        remote.close()
+    profiler.restore()
+    profiler.dump(profile)
     pg.quit()
 
-def record_game(screen) -> None:
-    """Save a snapshot of the current screen to the SNAP_FOLDER.
-
-    Parameter
-    ---------
-    screen: pygame.Surface (required)
-        Game window
-    """
-
-    global n_snap
-    extension = "png"
-    file_name = f"snapshot_{n_snap}.{extension}"
-    pg.image.save(screen, os.path.join(SNAP_FOLDER, file_name))
-    n_snap += 1
-
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Abalone game")
+    parser.add_argument(
+        "--computer", choices=("blue", "yellow"),
+        help="color played by the computer (player versus player if omitted)")
+    parser.add_argument(
+        "--time", type=float, default=const.COMPUTER_TIME,
+        help="computer's time budget per move in seconds")
+    parser.add_argument(
+        "--fps", type=int, default=const.FPS,
+        help="maximum redraws per second while animating (0: uncapped)")
+    parser.add_argument(
+        "--busy-loop", action="store_true",
+        help="redraw continuously instead of sleeping until the next event")
+    parser.add_argument(
+        "--record", choices=("png", "raw"),
+        help="records every frame to the snapshots folder")
+    parser.add_argument("--load", help="game record to be continued")
+    parser.add_argument("--save", help="file where the game record is written when quitting")
+    parser.add_argument("--connect", help="host:port of a server to play against a remote player")
+    parser.add_argument("--session", help="session to be joined (created if omitted)")
+    parser.add_argument(
+        "--profile", nargs="?", const="profile.txt",
+        help="shows the frame rate and writes the frame timings to a file when quitting")
+    args = parser.parse_args()
+    main({"blue": 2, "yellow": 3}.get(args.computer), args.time, args.fps,
+         not args.busy_loop, args.record, args.load, args.save, args.connect, args.session,
+         args.profile)
\ No newline at end of file
@@ -0,0 +1,105 @@
+"""
+Initial configurations of the board.
+Kept apart from constants.py so that they can be used without pygame.
+"""
+
+STANDARD = [
+    [2, 2, 2, 2, 2],
+    [2, 2, 2, 2, 2, 2],
+    [1, 1, 2, 2, 2, 1, 1],
+    [1, 1, 1, 1, 1, 1, 1, 1],
+    [1, 1, 1, 1, 1, 1, 1, 1, 1],
+    [1, 1, 1, 1, 1, 1, 1, 1],
+    [1, 1, 3, 3, 3, 1, 1],
+    [3, 3, 3, 3, 3, 3],
+    [3, 3, 3, 3, 3],
+]
+GERMAN_DAISY = (
+    [1, 1, 1, 1, 1],
+    [2, 2, 1, 1, 3, 3],
+    [2, 2, 2, 1, 3, 3, 3],
+    [1, 2, 2, 1, 1, 3, 3, 1],
+    [1, 1, 1, 1, 1, 1, 1, 1, 1],
+    [1, 3, 3, 1, 1, 2, 2, 1],
+    [3, 3, 3, 1, 2, 2, 2],
+    [3, 3, 1, 1, 2, 2],
+    [1, 1, 1, 1, 1],
+)
+BELGIAN_DAISY = (
+    [2, 2, 1, 3, 3],
+    [2, 2, 2, 3, 3, 3],
+    [1, 2, 2, 1, 3, 3, 1],
+    [1, 1, 1, 1, 1, 1, 1, 1],
+    [1, 1, 1, 1, 1, 1, 1, 1, 1],
+    [1, 1, 1, 1, 1, 1, 1, 1],
+    [1, 3, 3, 1, 2, 2, 1],
+    [3, 3, 3, 2, 2, 2],
+    [3, 3, 1, 2, 2],
+)
+DUTCH_DAISY = (
+    [2, 2, 1, 3, 3],
+    [2, 3, 2, 3, 2, 3],
+    [1, 2, 2, 1, 3, 3, 1],
+    [1, 1, 1, 1, 1, 1, 1, 1],
+    [1, 1, 1, 1, 1, 1, 1, 1, 1],
+    [1, 1, 1, 1, 1, 1, 1, 1],
+    [1, 3, 3, 1, 2, 2, 1],
+    [3, 2, 3, 2, 3, 2],
+    [3, 3, 1, 2, 2],
+)
+SWISS_DAISY = (
+    [1, 1, 1, 1, 1],
+    [2, 2, 1, 1, 3, 3],
+    [2, 3, 2, 1, 3, 2, 3],
+    [1, 2, 2, 1, 1, 3, 3, 1],
+    [1, 1, 1, 1, 1, 1, 1, 1, 1],
+    [1, 3, 3, 1, 1, 2, 2, 1],
+    [3, 2, 3, 1, 2, 3, 2],
+    [3, 3, 1, 1, 2, 2],
+    [1, 1, 1, 1, 1],
+)
+DOMINATION = (
+    [1, 1, 1, 1, 1],
+    [2, 1, 1, 1, 1, 3],
+    [2, 2, 1, 1, 1, 3, 3],
+    [2, 2, 2, 2, 1, 3, 3, 3],
+    [1, 1, 1, 3, 1, 3, 1, 1, 1],
+    [3, 3, 3, 1, 2, 2, 2, 2],
+    [3, 3, 1, 1, 1, 2, 2],
+    [3, 1, 1, 1, 1, 2],
+    [1, 1, 1, 1, 1],
+)
+PYRAMID = (
+    [2, 1, 1, 1, 1],
+    [2, 2, 1, 1, 1, 1],
+    [2, 2, 2, 1, 1, 1, 1],
+    [2, 2, 2, 2, 1, 1, 1, 1],
+    [2, 2, 2, 2, 1, 3, 3, 3, 3],
+    [1, 1, 1, 1, 3, 3, 3, 3],
+    [1, 1, 1, 1, 3, 3, 3],
+    [1, 1, 1, 1, 3, 3],
+    [1, 1, 1, 1, 3],
+)
+THE_WALL = (
+    [1, 1, 2, 1, 1],
+    [1, 1, 1, 1, 1, 1],
+    [1, 2, 2, 2, 2, 2, 1],
+    [2, 2, 2, 2, 2, 2, 2, 2],
+    [1, 1, 1, 1, 1, 1, 1, 1, 1],
+    [3, 3, 3, 3, 3, 3, 3, 3],
+    [1, 3, 3, 3, 3, 3, 1],
+    [1, 1, 1, 1, 1, 1],
+    [1, 1, 3, 1, 1],
+)
+
+# Every configuration by name
+LAYOUTS = {
+    "STANDARD": STANDARD,
+    "GERMAN_DAISY": GERMAN_DAISY,
+    "BELGIAN_DAISY": BELGIAN_DAISY,
+    "DUTCH_DAISY": DUTCH_DAISY,
+    "SWISS_DAISY": SWISS_DAISY,
+    "DOMINATION": DOMINATION,
+    "PYRAMID": PYRAMID,
+    "THE_WALL": THE_WALL,
+}
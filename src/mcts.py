@@ -0,0 +1,304 @@
+"""
+Monte Carlo Tree Search player.
+The tree is searched with UCT from the main process while the playouts are
+run by a pool of worker processes. Each task sent to the pool runs a batch of
+playouts from one leaf, and the pool is kept busy by selecting new leaves
+(with virtual losses) as soon as a task completes.
+The tree is kept between turns: searching a position already in the tree
+(e.g. after our move and the enemy's answer) reuses its statistics.
+"""
+
+import math
+import random
+from concurrent.futures import Future, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from os import cpu_count
+from time import perf_counter
+
+import numpy as np
+
+import rules
+from bitboard import Bitboard
+from evaluation import evaluate_positions
+
+# A playout stopping before the end of the game is scored by the static
+# evaluation, mapped to a win probability: 1 / (1 + exp(-score / SCALE))
+EVALUATION_SCALE = 400
+
+
+def playout_batch(state, playouts, seed, max_plies) -> float:
+    """
+    Runs random playouts from a position (executed by the worker processes).
+    Ejecting moves are always preferred to the other ones.
+    The playouts that did not end are evaluated together in a single batch.
+
+    Parameters
+    ----------
+    state: tuple (required)
+        Position, as given by Bitboard.key()
+    playouts: int (required)
+        Number of playouts
+    seed: int (required)
+        Seed of the random generator
+    max_plies: int (required)
+        Length after which a playout is stopped and evaluated
+    Returns
+    -------
+    float:
+        Sum of the results for blue (1 for a win, 0 for a loss)
+    """
+    rng = random.Random(seed)
+    choice = rng.choice
+    total = 0.0
+    unfinished = []
+    for _ in range(playouts):
+        position = Bitboard(*state)
+        for _ in range(max_plies):
+            if position.check_win():
+                break
+            moves = position.legal_moves()
+            ejections = [m for m in moves if m[2]]
+            position.make(choice(ejections or moves))
+        winner = position.check_win()
+        if winner:
+            total += winner == rules.BLUE
+        else:
+            unfinished.append(position)
+    if unfinished:
+        scores = evaluate_positions(unfinished)
+        # From blue's point of view
+        scores[[p.color != rules.BLUE for p in unfinished]] *= -1
+        total += float((1 / (1 + np.exp(-scores / EVALUATION_SCALE))).sum())
+    return total
+
+
+def completed(result) -> Future:
+    """Returns a future already holding its result (playouts run in-process)."""
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+class Node:
+    """
+    A node of the search tree.
+
+    Attributes
+    ----------
+    move: tuple
+        Bitboard move leading to this node (None for the root)
+    key: int
+        Zobrist hash of the position
+    color: int
+        Color who played self.move (rewards are counted for this color)
+    winner: int
+        Winning color if the position ends the game, False otherwise
+    untried: list
+        Legal moves not expanded yet
+    children: list
+        Expanded nodes
+    visits: float
+        Number of playouts through this node (including pending ones)
+    reward: float
+        Sum of the playout results for self.color
+    """
+
+    __slots__ = (
+        "move", "parent", "key", "color", "winner",
+        "untried", "children", "visits", "reward")
+
+    ######### Constructor #########
+    def __init__(self, move, parent, position, rng):
+        self.move = move
+        self.parent = parent
+        self.key = position.zobrist
+        self.color = rules.enemy_of(position.color)
+        self.winner = position.check_win()
+        self.untried = [] if self.winner else position.legal_moves()
+        rng.shuffle(self.untried)
+        self.children = []
+        self.visits = 0.0
+        self.reward = 0.0
+
+    ######### Methods #########
+    def select(self, exploration):
+        """Returns the child maximizing the UCT score."""
+        log_n = math.log(self.visits)
+        best, best_score = None, -1.0
+        for child in self.children:
+            score = (child.reward / child.visits
+                     + exploration * math.sqrt(log_n / child.visits))
+            if score > best_score:
+                best, best_score = child, score
+        return best
+
+    def find(self, key, depth):
+        """Returns the node of a position among the descendants (up to depth)."""
+        if self.key == key:
+            return self
+        if depth:
+            for child in self.children:
+                node = child.find(key, depth - 1)
+                if node is not None:
+                    return node
+        return None
+
+
+class MCTSPlayer:
+    """
+    A class used to search the best move of a position by Monte Carlo Tree Search.
+
+    Parameters
+    ----------
+    playouts: int (optional, default=2000)
+        Number of playouts per move (None: limited by time only)
+    time_limit: float (optional, default=None)
+        Time budget per move in seconds (None: limited by playouts only)
+    workers: int (optional, default=number of CPUs)
+        Number of worker processes. With 1 worker, playouts run in-process.
+    playouts_per_task: int (optional, default=8)
+        Number of playouts run by a worker for a single leaf
+    max_plies: int (optional, default=60)
+        Length after which a playout is stopped and evaluated
+    exploration: float (optional, default=1.0)
+        UCT exploration constant
+    seed: int (optional, default=None)
+        Seed of the random generators
+    Attributes
+    ----------
+    root: Node
+        Root of the search tree (kept between turns)
+    playouts_done: int
+        Number of playouts run by the last search
+    elapsed: float
+        Duration of the last search (seconds)
+    """
+
+    ######### Constructor #########
+    def __init__(self, playouts=2000, time_limit=None, workers=None,
+                 playouts_per_task=8, max_plies=60, exploration=1.0, seed=None):
+        if playouts is None and time_limit is None:
+            raise ValueError("playouts and time_limit cannot both be None")
+        self.playouts = playouts
+        self.time_limit = time_limit
+        self.workers = workers or cpu_count() or 1
+        self.playouts_per_task = playouts_per_task
+        self.max_plies = max_plies
+        self.exploration = exploration
+        self.rng = random.Random(seed)
+        self.root = None
+        self.pool = None
+        self.playouts_done = 0
+        self.elapsed = 0.0
+
+    ######### Methods #########
+    def close(self) -> None:
+        """Shuts the worker processes down."""
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def playouts_per_second(self) -> float:
+        """Returns the playout throughput of the last search."""
+        return self.playouts_done / self.elapsed if self.elapsed else 0.0
+
+    def search(self, position):
+        """
+        Searches the best move of a position.
+
+        Parameter
+        ---------
+        position: Bitboard (required)
+            Position to be searched (left untouched)
+        Returns
+        -------
+        tuple if the color to play has a legal move
+            Bitboard move
+        None otherwise
+        """
+        start = perf_counter()
+        self.reuse(position)
+        root = self.root
+        if root.winner or not (root.untried or root.children):
+            return None
+        if self.workers > 1 and self.pool is None:
+            self.pool = ProcessPoolExecutor(self.workers)
+        self.playouts_done = 0
+        pending = {}
+        while True:
+            out_of_time = (self.time_limit is not None
+                           and perf_counter() - start >= self.time_limit)
+            submitted = self.playouts_done + len(pending) * self.playouts_per_task
+            enough = self.playouts is not None and submitted >= self.playouts
+            if not (out_of_time or enough):
+                # Keeping every worker busy
+                while len(pending) < 2 * self.workers:
+                    self.submit(position, pending)
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                self.backpropagate(pending.pop(future), future.result())
+        self.elapsed = perf_counter() - start
+        return max(root.children, key=lambda child: child.visits).move
+
+    def reuse(self, position) -> None:
+        """Moves the root to the node of position if it is in the tree, else starts over."""
+        node = None
+        if self.root is not None:
+            node = self.root.find(position.zobrist, 2)
+        if node is None:
+            node = Node(None, None, position, self.rng)
+        node.parent = None
+        self.root = node
+
+    def advance(self, move) -> None:
+        """Keeps the subtree of a move played from the root (tree reuse)."""
+        if self.root is None:
+            return
+        for child in self.root.children:
+            if child.move == move:
+                child.parent = None
+                self.root = child
+                return
+        self.root = None
+
+    def submit(self, position, pending) -> None:
+        """Selects and expands a leaf, then sends its playouts to the pool."""
+        n = self.playouts_per_task
+        node = self.root
+        position = position.copy()
+        node.visits += n # Virtual loss until the results come back
+        while not node.untried and node.children:
+            node = node.select(self.exploration)
+            position.make(node.move)
+            node.visits += n
+        if node.untried:
+            move = node.untried.pop()
+            position.make(move)
+            child = Node(move, node, position, self.rng)
+            node.children.append(child)
+            node = child
+            node.visits += n
+        if node.winner:
+            result = n if node.winner == rules.BLUE else 0.0
+            future = completed(result)
+        else:
+            seed = self.rng.getrandbits(32)
+            args = (position.key(), n, seed, self.max_plies)
+            if self.pool is None:
+                future = completed(playout_batch(*args))
+            else:
+                future = self.pool.submit(playout_batch, *args)
+        pending[future] = node
+
+    def backpropagate(self, node, blue_total) -> None:
+        """Adds the results of a batch of playouts (for blue) to a leaf and its ancestors."""
+        n = self.playouts_per_task
+        self.playouts_done += n
+        while node is not None:
+            if node.color == rules.BLUE:
+                node.reward += blue_total
+            else:
+                node.reward += n - blue_total
+            node = node.parent
+
@@ -0,0 +1,139 @@
+"""
+Perft benchmark and correctness suite of the move generation.
+Counts the leaf nodes of the game tree, up to a given depth, from every
+starting configuration (blue plays first) and compares them with reference
+counts. A finished game (6 marbles ejected) has no children.
+Counts differing from REFERENCE mean the rules changed, a nodes/second
+below --min-nps means the move generation got slower: both make the
+script exit with status 1.
+
+Usage:
+    python src/perft.py                         # depths 1 to 3, every layout
+    python src/perft.py --depth 4 --layout STANDARD
+    python src/perft.py --generator rules       # slower, independent generator
+    python src/perft.py --min-nps 200000
+"""
+
+import argparse
+import sys
+from time import perf_counter
+
+import rules
+from bitboard import Bitboard
+from layouts import LAYOUTS
+
+# Leaf nodes at depth 1, 2, 3... from every layout, blue playing first.
+# Depth 1 to 4 agree between bitboard.Bitboard.legal_moves and rules.legal_moves.
+REFERENCE = {
+    "STANDARD": (44, 1936, 98912, 5045110),
+    "GERMAN_DAISY": (80, 6244, 493480, 38240570),
+    "BELGIAN_DAISY": (52, 2692, 149322, 8270666),
+    "DUTCH_DAISY": (44, 1946, 87324, 3958134),
+    "SWISS_DAISY": (64, 4066, 254170, 15826362),
+    "DOMINATION": (70, 5362, 370292, 27019264),
+    "PYRAMID": (58, 3262, 193860, 11346288),
+    "THE_WALL": (102, 9630, 882256, 77263408),
+}
+
+
+def perft(position, depth) -> int:
+    """
+    Counts the leaf nodes at a given depth with bitboard moves.
+
+    Parameters
+    ----------
+    position: Bitboard (required)
+        Starting position, restored when done
+    depth: int (required)
+        Depth of the leaf nodes (>= 1)
+    """
+    if position.check_win():
+        return 0
+    moves = position.legal_moves()
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        position.make(move)
+        nodes += perft(position, depth - 1)
+        position.unmake(move)
+    return nodes
+
+def perft_rules(cells, color, depth, lost=(0, 0)) -> int:
+    """
+    Counts the leaf nodes at a given depth with rules.Move objects.
+    Slower than perft, used to cross-check both move generators.
+
+    Parameters
+    ----------
+    cells: list of int (required)
+        Flat board (see rules.flatten), restored when done
+    color: int (required)
+        Color to play
+    depth: int (required)
+        Depth of the leaf nodes (>= 1)
+    lost: tuple (optional, default=(0, 0))
+        Number of blue and yellow marbles ejected so far
+    """
+    if 6 in lost:
+        return 0
+    nodes = 0
+    for move in rules.legal_moves(cells, color):
+        if depth == 1:
+            nodes += 1
+            continue
+        if move.ejected == rules.BLUE:
+            next_lost = lost[0] + 1, lost[1]
+        elif move.ejected == rules.YELLOW:
+            next_lost = lost[0], lost[1] + 1
+        else:
+            next_lost = lost
+        rules.apply(cells, move)
+        nodes += perft_rules(cells, rules.enemy_of(color), depth - 1, next_lost)
+        rules.undo(cells, move)
+    return nodes
+
+def main():
+    parser = argparse.ArgumentParser(description="Abalone perft suite")
+    parser.add_argument("--depth", type=int, default=3, help="maximum depth")
+    parser.add_argument("--layout", choices=sorted(LAYOUTS), action="append",
+                        help="layout to run (can be repeated, default: all)")
+    parser.add_argument("--generator", choices=("bitboard", "rules"), default="bitboard")
+    parser.add_argument("--min-nps", type=float, default=0,
+                        help="fail if fewer nodes per second are counted")
+    args = parser.parse_args()
+
+    failed = False
+    total_nodes, total_time = 0, 0.0
+    print(f"{'Layout':<15}{'Depth':>6}{'Nodes':>12}{'Nodes/s':>12}  Reference")
+    for name in args.layout or LAYOUTS:
+        cells = rules.flatten(LAYOUTS[name])
+        position = Bitboard.from_cells(cells, rules.BLUE)
+        for depth in range(1, args.depth + 1):
+            start = perf_counter()
+            if args.generator == "bitboard":
+                nodes = perft(position, depth)
+            else:
+                nodes = perft_rules(cells, rules.BLUE, depth)
+            elapsed = perf_counter() - start
+            total_nodes += nodes
+            total_time += elapsed
+            reference = REFERENCE[name]
+            if depth > len(reference):
+                status = "-"
+            elif nodes == reference[depth - 1]:
+                status = "ok"
+            else:
+                status = f"MISMATCH (expected {reference[depth - 1]})"
+                failed = True
+            nps = nodes / elapsed if elapsed else float("inf")
+            print(f"{name:<15}{depth:>6}{nodes:>12}{nps:>12.0f}  {status}")
+    nps = total_nodes / total_time if total_time else float("inf")
+    print(f"Total: {total_nodes} nodes in {total_time:.2f}s ({nps:.0f} nodes/s)")
+    if nps < args.min_nps:
+        print(f"Too slow: {nps:.0f} < {args.min_nps:.0f} nodes/s")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
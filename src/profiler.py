@@ -0,0 +1,185 @@
+"""
+Frame-time instrumentation of the game loop (python src/game.py --profile).
+The loop times its phases (event handling, drawing, screen update, search)
+with start/stop, and instrumented functions (display.*, Board.push_marble,
+...) are timed and counted on every call. A rolling FPS and frame-time
+message is shown on screen, and per-frame histograms of every phase and
+function are written to a file when quitting.
+
+Nested functions are timed inclusively: board_layer includes display_marbles.
+The frame time is the sum of the loop's phases, the time spent waiting for
+events being excluded.
+"""
+
+import inspect
+from collections import defaultdict, deque
+from time import perf_counter
+
+import constants as const
+
+# Upper bounds (ms) of the histogram buckets, the last bucket being unbounded
+BUCKETS = (0.5, 1, 2, 4, 8, 16, 33)
+
+
+class Profiler:
+    """
+    Per-frame timings of the game loop.
+    A disabled profiler does nothing and costs a method call per phase.
+
+    Parameters
+    ----------
+    enabled: bool (optional, default=True)
+        False to disable every measure
+    history: int (optional, default=120)
+        Frames used to compute the rolling FPS and frame time
+
+    Attributes
+    ----------
+    samples: dict
+        keys: str (phase or function), values: list of ms per frame
+    counts: dict
+        keys: str (function), values: list of calls per frame
+    """
+
+    ######### Constructor #########
+    def __init__(self, enabled=True, history=120):
+        self.enabled = enabled
+        self.phases = []
+        self.functions = []
+        self.started = {}
+        self.frame = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.samples = defaultdict(list)
+        self.counts = defaultdict(list)
+        self.frame_times = []
+        self.recent = deque(maxlen=history)
+        self.originals = []
+        self.message = None
+        self.message_time = 0.0
+        self.start_time = perf_counter()
+
+    ######### Methods #########
+    def start(self, phase) -> None:
+        """Starts timing a phase of the game loop."""
+        if self.enabled:
+            self.started[phase] = perf_counter()
+
+    def stop(self, phase) -> None:
+        """Stops timing a phase, its time being added to the current frame."""
+        if self.enabled:
+            self.frame[phase] += perf_counter() - self.started.pop(phase)
+            if phase not in self.phases:
+                self.phases.append(phase)
+
+    def instrument(self, owner, names=None) -> None:
+        """
+        Replaces functions of a module or methods of a class by timed ones.
+
+        Parameters
+        ----------
+        owner: module or class (required)
+            Owner of the functions
+        names: list of str (optional, default=None)
+            Functions to be timed, every function defined in a module if None
+        """
+        if not self.enabled:
+            return
+        if names is None:
+            names = [
+                name for name, function in inspect.getmembers(owner, inspect.isfunction)
+                if function.__module__ == owner.__name__
+            ]
+        for name in names:
+            function = getattr(owner, name)
+            label = f"{owner.__name__}.{name}"
+            self.originals.append((owner, name, function))
+            self.functions.append(label)
+            setattr(owner, name, self.timed(label, function))
+
+    def timed(self, label, function):
+        """Returns function, timing and counting its calls as label."""
+        frame, calls = self.frame, self.calls
+
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                frame[label] += perf_counter() - start
+                calls[label] += 1
+        return wrapper
+
+    def restore(self) -> None:
+        """Puts back the functions replaced by self.instrument."""
+        for owner, name, function in reversed(self.originals):
+            setattr(owner, name, function)
+        self.originals.clear()
+
+    def end_frame(self) -> None:
+        """Stores the timings of the current frame and starts a new one."""
+        if not self.enabled:
+            return
+        frame_time = sum(self.frame[phase] for phase in self.phases) * 1000
+        self.frame_times.append(frame_time)
+        self.recent.append((perf_counter(), frame_time))
+        for name in self.phases + self.functions:
+            self.samples[name].append(self.frame.get(name, 0.0) * 1000)
+        for name in self.functions:
+            self.counts[name].append(self.calls.get(name, 0))
+        self.frame.clear()
+        self.calls.clear()
+
+    def overlay(self) -> list:
+        """
+        Returns the rolling FPS and frame-time message (see display.message),
+        refreshed twice per second.
+        """
+        if not self.enabled or len(self.recent) < 2:
+            return []
+        now = perf_counter()
+        if self.message is None or now - self.message_time > 0.5:
+            elapsed = self.recent[-1][0] - self.recent[0][0]
+            times = [t for _, t in self.recent]
+            fps = (len(self.recent) - 1) / elapsed if elapsed else 0.0
+            text = (f"{fps:.0f} FPS  {sum(times) / len(times):.2f} ms/frame"
+                    f"  (max {max(times):.2f})")
+            self.message = [text, const.PROFILER_FONT_SIZE, const.PROFILER_COLOR,
+                            const.PROFILER_POSITION]
+            self.message_time = now
+        return [self.message]
+
+    def report(self) -> str:
+        """Returns the statistics and histograms of every phase and function."""
+        elapsed = perf_counter() - self.start_time
+        n = len(self.frame_times)
+        lines = [f"Frames: {n} in {elapsed:.1f}s ({n / elapsed if elapsed else 0:.1f} FPS)"]
+        header = ["calls/frame", "mean", "p50", "p95", "max"]
+        header += [f"<{bound}" for bound in BUCKETS] + [f">={BUCKETS[-1]}"]
+        lines.append(f"{'(ms per frame)':<32}" + "".join(f"{h:>12}" for h in header))
+        for name, values in [("frame", self.frame_times)] + [
+                (name, self.samples[name]) for name in self.phases + self.functions]:
+            if not values or not any(values):
+                continue
+            # Phases started late (search) or after end_frame (events) have fewer samples
+            ordered = sorted(values)
+            m = len(values)
+            counts = self.counts.get(name)
+            histogram = [0] * (len(BUCKETS) + 1)
+            for value in values:
+                histogram[next(
+                    (i for i, bound in enumerate(BUCKETS) if value < bound), len(BUCKETS))] += 1
+            row = [
+                f"{sum(counts) / len(counts):.1f}" if counts else "-",
+                f"{sum(values) / m:.3f}",
+                f"{ordered[m // 2]:.3f}",
+                f"{ordered[int(m * 0.95)]:.3f}",
+                f"{ordered[-1]:.3f}",
+            ] + [str(count) for count in histogram]
+            lines.append(f"{name:<32}" + "".join(f"{cell:>12}" for cell in row))
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path) -> None:
+        """Writes self.report to a file."""
+        if self.enabled and self.frame_times:
+            with open(path, "w") as f:
+                f.write(self.report())
@@ -0,0 +1,201 @@
+"""
+Asynchronous recording of the game window.
+Frames are copied from the screen by the game loop and handed to a
+background thread through a bounded queue, so that disk I/O and compression
+never stall the rendering. When the writer falls behind and the queue is
+full, frames are dropped and counted instead of blocking the game.
+
+Two formats are available:
+    png: one snapshot_<n>.png file per frame (as the original recorder)
+    raw: a single recording_<n>.abr file, every frame compressed with zlib,
+         to be converted into PNG files later:
+         python src/recorder.py snapshots/recording_0.abr --output frames
+"""
+
+import argparse
+import os
+import queue
+import struct
+import threading
+import zlib
+
+import pygame as pg
+
+# Raw container: header (magic, width, height), then (length, zlib data) per frame
+MAGIC = b"ABR1"
+HEADER = struct.Struct("<4sHH")
+FRAME = struct.Struct("<I")
+PIXEL_FORMAT = "RGB"
+
+
+class Recorder:
+    """
+    Background writer of the game's frames.
+
+    Parameters
+    ----------
+    folder: str (required)
+        Directory of the recordings, created if needed
+    mode: str (optional, default="png")
+        "png" (one file per frame) or "raw" (single compressed stream)
+    max_queue: int (optional, default=64)
+        Frames waiting to be written before new ones are dropped
+    compression: int (optional, default=1)
+        zlib level of the raw stream (0: none, 9: smallest)
+
+    Attributes
+    ----------
+    written: int
+        Frames written to disk
+    dropped: int
+        Frames dropped because the writer was behind or failed
+    error: Exception
+        First write error (None if none), the following frames being dropped
+    """
+
+    ######### Constructor #########
+    def __init__(self, folder, mode="png", max_queue=64, compression=1):
+        if mode not in ("png", "raw"):
+            raise ValueError(f"Unknown recording mode: {mode}")
+        os.makedirs(folder, exist_ok=True)
+        self.folder = folder
+        self.mode = mode
+        self.compression = compression
+        self.written = 0
+        self.dropped = 0
+        self.n_snap = None
+        self.stream = None
+        self.path = None
+        self.error = None
+        self.frames = queue.Queue(max_queue)
+        self.thread = threading.Thread(target=self.write_frames, daemon=True)
+        self.thread.start()
+
+    ######### Methods #########
+    def capture(self, screen) -> bool:
+        """
+        Queues a copy of the screen, without waiting for the writer.
+
+        Parameter
+        ---------
+        screen: pygame.Surface (required)
+            Game window
+        Returns
+        -------
+        bool:
+            True if the frame was queued, False if it was dropped
+        """
+        frame = (screen.get_size(), pg.image.tobytes(screen, PIXEL_FORMAT))
+        try:
+            self.frames.put_nowait(frame)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def first_unused(self, prefix, extension) -> int:
+        """Returns the first n such that prefix_<n>.extension is not in the folder."""
+        n = 0
+        while os.path.exists(os.path.join(self.folder, f"{prefix}_{n}.{extension}")):
+            n += 1
+        return n
+
+    def write_frames(self) -> None:
+        """
+        Writes the queued frames until None is received (writer thread).
+        After a write error, the queue is still drained so that neither
+        capture nor close ever wait, the remaining frames being dropped.
+        """
+        while True:
+            frame = self.frames.get()
+            if frame is None:
+                break
+            if self.error is not None:
+                self.dropped += 1
+                continue
+            try:
+                self.write_frame(*frame)
+            except (OSError, pg.error) as error:
+                self.error = error
+                self.dropped += 1
+                continue
+            self.written += 1
+        if self.stream is not None:
+            try:
+                self.stream.close()
+            except OSError as error:
+                self.error = self.error or error
+
+    def write_frame(self, size, pixels) -> None:
+        """Writes a frame to a PNG file or to the raw stream."""
+        if self.mode == "png":
+            if self.n_snap is None:
+                self.n_snap = self.first_unused("snapshot", "png")
+            image = pg.image.frombytes(pixels, size, PIXEL_FORMAT)
+            pg.image.save(image, os.path.join(self.folder, f"snapshot_{self.n_snap}.png"))
+            self.n_snap += 1
+        else:
+            if self.stream is None:
+                n = self.first_unused("recording", "abr")
+                self.path = os.path.join(self.folder, f"recording_{n}.abr")
+                self.stream = open(self.path, "wb")
+                self.stream.write(HEADER.pack(MAGIC, *size))
+            data = zlib.compress(pixels, self.compression)
+            self.stream.write(FRAME.pack(len(data)))
+            self.stream.write(data)
+
+    def close(self) -> str:
+        """
+        Writes the remaining frames and stops the writer.
+
+        Returns
+        -------
+        str:
+            Summary of the recording
+        """
+        # The writer drains the queue, so the end marker always gets in
+        self.frames.put(None)
+        self.thread.join()
+        total = self.written + self.dropped
+        summary = f"Recorded {self.written} frames, dropped {self.dropped}"
+        if total:
+            summary += f" ({100 * self.dropped / total:.1f}%)"
+        summary += f" to {self.path}" if self.path else f" to {self.folder}"
+        if self.error is not None:
+            summary += f", stopped by a write error: {self.error}"
+        return summary
+
+
+def read_frames(path):
+    """
+    Yields the frames of a raw recording as pygame surfaces.
+
+    Parameter
+    ---------
+    path: str (required)
+        Raw recording (.abr)
+    """
+    with open(path, "rb") as stream:
+        magic, width, height = HEADER.unpack(stream.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a raw recording")
+        while True:
+            length = stream.read(FRAME.size)
+            if not length:
+                break
+            data = stream.read(FRAME.unpack(length)[0])
+            yield pg.image.frombytes(zlib.decompress(data), (width, height), PIXEL_FORMAT)
+
+def main():
+    parser = argparse.ArgumentParser(description="Converts a raw recording into PNG files")
+    parser.add_argument("recording", help="raw recording (.abr)")
+    parser.add_argument("--output", default="frames", help="directory of the PNG files")
+    args = parser.parse_args()
+    os.makedirs(args.output, exist_ok=True)
+    n = 0
+    for n, frame in enumerate(read_frames(args.recording), 1):
+        pg.image.save(frame, os.path.join(args.output, f"snapshot_{n - 1}.png"))
+    print(f"{n} frames written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Compact game records and their replay.
+A game is stored as its starting layout, the color playing first and the
+list of its moves in a short notation, a few bytes per move:
+
+    STANDARD blue
+    c3NE g5NW d3d4d5SE ...
+
+Cells are named as on a printed Abalone board: rows "a" (bottom) to "i"
+(top), diagonals 1 to 9. An inline move is written with its rear marble,
+a broadside move with all its marbles, both followed by the direction
+(E, NE, NW, W, SW, SE). The marbles of a broadside move are written from
+the top-left one.
+
+Replaying does not need a window: positions are rebuilt with bitboards,
+keyframes being kept every few plies so that seeking to any ply only plays
+a handful of moves.
+
+Usage:
+    python src/records.py game.abl              # summary of a saved game
+    python src/records.py game.abl --ply 150    # position after 150 plies
+"""
+
+import argparse
+import bisect
+
+import rules
+from bitboard import Bitboard, encode
+from layouts import LAYOUTS
+
+# Cell names ("a1" to "i9"), following the layout of rules.CELLS
+CELL_NAMES = tuple(
+    "ihgfedcba"[r] + str(max(5 - r, 1) + c) for r, c in rules.CELLS
+)
+CELL_OF_NAME = {name: i for i, name in enumerate(CELL_NAMES)}
+DIRECTION_OF_NAME = {name: d for d, name in enumerate(rules.DIRECTION_NAMES)}
+COLOR_NAMES = {rules.BLUE: "blue", rules.YELLOW: "yellow"}
+COLOR_OF_NAME = {name: color for color, name in COLOR_NAMES.items()}
+KEYFRAME_INTERVAL = 16 # Plies between two keyframes of a Replay
+
+
+def notation(move) -> str:
+    """Returns the short notation of a rules.Move (see the module's docstring)."""
+    # Inline moves are identified by their rear marble, their line being implied
+    if move.direction % 3 == direction_of_line(move.marbles):
+        marbles = move.marbles[:1]
+    else:
+        marbles = sorted(move.marbles)
+    return "".join(CELL_NAMES[c] for c in marbles) + rules.DIRECTION_NAMES[move.direction]
+
+def direction_of_line(marbles):
+    """Returns the axis (0 to 2) of a line of marbles, None for a single marble."""
+    if len(marbles) < 2:
+        return None
+    return rules.direction(marbles[0], marbles[1]) % 3
+
+def parse_move(text, cells, color):
+    """
+    Converts a move written in short notation into a rules.Move.
+
+    Parameters
+    ----------
+    text: str (required)
+        Move in short notation (e.g. "c3NE", "d3d4SE")
+    cells: list of int (required)
+        Flat board the move is played on (see rules.flatten)
+    color: int (required)
+        Color playing the move
+    Returns
+    -------
+    rules.Move:
+        Legal move
+    Raises
+    ------
+    ValueError:
+        If the notation is malformed or the move is illegal
+    """
+    split = len(text.rstrip("ENWS"))
+    names = [text[i:i + 2] for i in range(0, split, 2)]
+    d = DIRECTION_OF_NAME.get(text[split:])
+    if d is None or not names or any(name not in CELL_OF_NAME for name in names):
+        raise ValueError(f"Malformed move: {text}")
+    marbles = [CELL_OF_NAME[name] for name in names]
+    if len(marbles) == 1:
+        move = rules.push(cells, color, marbles[0], d) if cells[marbles[0]] == color else None
+    else:
+        move = rules.broadside(cells, color, marbles, d)
+    if move is None:
+        raise ValueError(f"Illegal move: {text}")
+    return move
+
+
+class GameRecord:
+    """
+    Compact record of a game.
+
+    Parameters
+    ----------
+    layout: str (optional, default="STANDARD")
+        Name of the starting configuration (see layouts.py)
+    first_color: int (optional, default=2)
+        Color playing the first move
+    moves: list of str (optional, default=())
+        Moves in short notation
+    """
+
+    ######### Constructor #########
+    def __init__(self, layout="STANDARD", first_color=rules.BLUE, moves=()):
+        if layout not in LAYOUTS:
+            raise ValueError(f"Unknown layout: {layout}")
+        self.layout = layout
+        self.first_color = first_color
+        self.moves = list(moves)
+
+    ######### Methods #########
+    @classmethod
+    def from_board(cls, board):
+        """Records the game played so far on a Board."""
+        cells = rules.flatten(board.configuration)
+        for name, layout in LAYOUTS.items():
+            if rules.flatten(layout) == cells:
+                break
+        else:
+            raise ValueError("The starting configuration is not a known layout")
+        return cls(name, board.first_color, [notation(move) for move in board.moves])
+
+    @classmethod
+    def from_text(cls, text):
+        """Parses a record written by self.to_text."""
+        tokens = text.split()
+        if len(tokens) < 2 or tokens[1] not in COLOR_OF_NAME:
+            raise ValueError("Malformed game record")
+        return cls(tokens[0], COLOR_OF_NAME[tokens[1]], tokens[2:])
+
+    def to_text(self) -> str:
+        """Returns the record as text: a header line, then the moves."""
+        header = f"{self.layout} {COLOR_NAMES[self.first_color]}"
+        return header + "\n" + " ".join(self.moves) + "\n"
+
+    @classmethod
+    def load(cls, path):
+        """Reads a record from a file."""
+        with open(path) as f:
+            return cls.from_text(f.read())
+
+    def save(self, path) -> None:
+        """Writes the record to a file."""
+        with open(path, "w") as f:
+            f.write(self.to_text())
+
+
+class Replay:
+    """
+    Rebuilds the positions of a recorded game.
+    Every move is checked once when the replay is created.
+
+    Parameters
+    ----------
+    record: GameRecord (required)
+        Game to be replayed
+    keyframe_interval: int (optional, default=KEYFRAME_INTERVAL)
+        Plies between two stored positions
+
+    Attributes
+    ----------
+    moves: list of rules.Move
+        Moves of the game
+    keyframes: dict
+        keys: int (ply), values: Bitboard
+    """
+
+    ######### Constructor #########
+    def __init__(self, record, keyframe_interval=KEYFRAME_INTERVAL):
+        self.record = record
+        self.keyframe_interval = keyframe_interval
+        self.moves = []
+        self.bitboard_moves = []
+        cells = rules.flatten(LAYOUTS[record.layout])
+        position = Bitboard.from_cells(cells, record.first_color)
+        self.keyframes = {0: position.copy()}
+        for ply, text in enumerate(record.moves, 1):
+            if position.check_win():
+                raise ValueError(f"Move played after the end of the game: {text}")
+            move = parse_move(text, cells, position.color)
+            self.moves.append(move)
+            self.bitboard_moves.append(encode(move, position.color))
+            rules.apply(cells, move)
+            position.make(self.bitboard_moves[-1])
+            if ply % keyframe_interval == 0:
+                self.keyframes[ply] = position.copy()
+        self.plies = sorted(self.keyframes)
+
+    ######### Methods #########
+    def __len__(self):
+        return len(self.moves)
+
+    def position(self, ply) -> Bitboard:
+        """
+        Returns the position after a given number of plies.
+
+        Parameter
+        ---------
+        ply: int (required)
+            Number of moves played, from 0 to len(self)
+        """
+        if not 0 <= ply <= len(self.moves):
+            raise IndexError(f"Ply out of range: {ply}")
+        start = self.plies[bisect.bisect_right(self.plies, ply) - 1]
+        position = self.keyframes[start].copy()
+        for move in self.bitboard_moves[start:ply]:
+            position.make(move)
+        return position
+
+    def seek(self, board, ply) -> None:
+        """
+        Sets a Board to the position after a given number of plies,
+        keeping the moves played so far so that the game can be continued.
+
+        Parameters
+        ----------
+        board: Board (required)
+            Board to be updated
+        ply: int (required)
+            Number of moves played, from 0 to len(self)
+        """
+        board.load_bitboard(self.position(ply))
+        board.configuration = [list(row) for row in LAYOUTS[self.record.layout]]
+        board.first_color = self.record.first_color
+        board.moves = self.moves[:ply]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Abalone game records")
+    parser.add_argument("record", help="game record")
+    parser.add_argument("--ply", type=int, default=None, help="ply to be displayed")
+    args = parser.parse_args()
+    record = GameRecord.load(args.record)
+    replay = Replay(record)
+    print(f"{record.layout}, {COLOR_NAMES[record.first_color]} first, {len(replay)} plies")
+    position = replay.position(len(replay) if args.ply is None else args.ply)
+    rows = rules.unflatten(position.to_cells())
+    for r, row in enumerate(rows):
+        print(" " * abs(4 - r) + " ".join(".BY"[value - 1] for value in row))
+    winner = position.check_win()
+    print(f"Score: blue {position.blue_score}, yellow {position.yellow_score}", end="")
+    print(f", {COLOR_NAMES[winner]} wins" if winner else "")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+Coordinate-native Abalone rules.
+The 61 cells of the board are indexed from 0 (top-left) to 60 (bottom-right),
+row by row, following the layout of Board.data.
+Every cell also has an axial coordinate (q, r): r is the row index and q grows
+towards the east, so that the six neighbours of a cell are obtained by adding
+one of the six DIRECTIONS vectors. Nothing here depends on pixels nor on pygame.
+
+Cell values are the same as in Board.data: 1 (empty), 2 (blue) and 3 (yellow).
+"""
+
+from collections import namedtuple
+
+EMPTY = 1
+BLUE = 2
+YELLOW = 3
+OFF = -1 # Neighbour of a cell lying outside the board
+
+N_ROWS = 9
+ROW_LENGTHS = tuple(9 - abs(r - 4) for r in range(N_ROWS))
+N_CELLS = sum(ROW_LENGTHS)
+
+# Axial vectors (dq, dr). Opposite directions are 3 indices apart.
+DIRECTIONS = (
+    (1, 0),   # E
+    (1, -1),  # NE
+    (0, -1),  # NW
+    (-1, 0),  # W
+    (-1, 1),  # SW
+    (0, 1),   # SE
+)
+DIRECTION_NAMES = ("E", "NE", "NW", "W", "SW", "SE")
+E, NE, NW, W, SW, SE = range(6)
+# One direction per axis, used to enumerate ranges of marbles only once
+AXES = (E, NE, NW)
+
+# (row, column) location in Board.data of every cell index
+CELLS = tuple((r, c) for r in range(N_ROWS) for c in range(ROW_LENGTHS[r]))
+# Cell index of every (row, column) location
+INDEX = {loc: i for i, loc in enumerate(CELLS)}
+# Axial coordinate of every cell index
+AXIAL = tuple((c - min(r, 4), r) for r, c in CELLS)
+AXIAL_INDEX = {qr: i for i, qr in enumerate(AXIAL)}
+# NEIGHBOURS[i][d]: index of the neighbour of cell i in direction d (OFF if none)
+NEIGHBOURS = tuple(
+    tuple(AXIAL_INDEX.get((q + dq, r + dr), OFF) for dq, dr in DIRECTIONS)
+    for q, r in AXIAL
+)
+# DIRECTION_TO[i][j]: direction from cell i to its neighbour j
+DIRECTION_TO = tuple(
+    {j: d for d, j in enumerate(NEIGHBOURS[i]) if j != OFF}
+    for i in range(N_CELLS)
+)
+
+# A move is fully described by the friendly marbles moving (from the tail to
+# the head for inline moves) and its direction.
+# The other fields are derived from the position the move was generated in:
+#   pushed: number of enemy marbles pushed (sumito when > 0)
+#   ejected: color of the marble pushed off the board (0 if none)
+#   changes: (cell, old value, new value) for every modified cell.
+#       Applying the new values plays the move, applying the old ones undoes it.
+Move = namedtuple("Move", ["marbles", "direction", "pushed", "ejected", "changes"])
+
+
+def flatten(data) -> list:
+    """Converts Board.data (list of rows) into a flat list of 61 cell values."""
+    return [value for row in data for value in row]
+
+def unflatten(cells) -> list:
+    """Converts a flat list of 61 cell values into a list of rows (Board.data)."""
+    rows, start = [], 0
+    for length in ROW_LENGTHS:
+        rows.append(list(cells[start:start + length]))
+        start += length
+    return rows
+
+def enemy_of(color) -> int:
+    """Returns the enemy of a given color."""
+    return YELLOW if color == BLUE else BLUE
+
+def direction(origin, target):
+    """
+    Returns the direction going from one cell to a neighbouring one.
+
+    Parameters
+    ----------
+    origin: int (required)
+        Index of the starting cell
+    target: int (required)
+        Index of the neighbouring cell
+    Returns
+    -------
+    int if both cells are neighbours
+        Index in DIRECTIONS
+    None otherwise
+    """
+    return DIRECTION_TO[origin].get(target)
+
+def line_axis(selection):
+    """
+    Checks if a selection of marbles forms a valid range: 2 or 3 cells
+    neighbouring each other along a unique axis.
+    The order in which the cells have been selected does not matter.
+
+    Parameter
+    ---------
+    selection: iterable of int (required)
+        Indices of the selected cells
+    Returns
+    -------
+    tuple if the range is valid
+        (cells ordered along the axis, axis direction)
+    None otherwise
+    """
+    cells = set(selection)
+    if not 2 <= len(cells) <= 3:
+        return None
+    for start in cells:
+        for d, nxt in enumerate(NEIGHBOURS[start]):
+            line = [start]
+            while nxt in cells and nxt not in line:
+                line.append(nxt)
+                nxt = NEIGHBOURS[nxt][d]
+            if len(line) == len(cells):
+                return tuple(line), d
+    return None
+
+def push(cells, color, origin, d):
+    """
+    Pushes the marble at origin, and every friendly marble in front of it,
+    one step towards d (inline move). Enemy marbles in front of the line are
+    pushed as well (sumito) and can be ejected from the board.
+    A move is invalid if more than 3 friendly marbles are moved,
+    if the enemy marbles are at least as many as the friendly ones,
+    if a friendly marble stands behind the enemy ones (squeezed enemy)
+    or if a friendly marble would leave the board.
+
+    Parameters
+    ----------
+    cells: list of int (required)
+        Flat board (see flatten)
+    color: int (required)
+        Color being played
+    origin: int (required)
+        Index of the last marble of the line (must be of color)
+    d: int (required)
+        Index in DIRECTIONS
+    Returns
+    -------
+    Move if the push is valid
+    None otherwise
+    """
+    neighbours = NEIGHBOURS
+    line = [origin]
+    nxt = neighbours[origin][d]
+    while nxt != OFF and cells[nxt] == color:
+        line.append(nxt)
+        nxt = neighbours[nxt][d]
+    # Cannot push more than 3 marbles nor push them off the board
+    if len(line) > 3 or nxt == OFF:
+        return None
+    head = nxt
+    if cells[head] == EMPTY:
+        changes = ((origin, color, EMPTY), (head, EMPTY, color))
+        return Move(tuple(line), d, 0, 0, changes)
+    # Sumito
+    enemy = cells[head]
+    pushed = 0
+    while nxt != OFF and cells[nxt] == enemy:
+        pushed += 1
+        nxt = neighbours[nxt][d]
+    if pushed >= len(line) or (nxt != OFF and cells[nxt] != EMPTY):
+        return None
+    if nxt == OFF:
+        changes = ((origin, color, EMPTY), (head, enemy, color))
+        return Move(tuple(line), d, pushed, enemy, changes)
+    changes = ((origin, color, EMPTY), (head, enemy, color), (nxt, EMPTY, enemy))
+    return Move(tuple(line), d, pushed, 0, changes)
+
+def broadside(cells, color, selection, d):
+    """
+    Moves a range of 2 or 3 marbles sideways: every marble moves one step
+    towards d and every target cell must be empty.
+
+    Parameters
+    ----------
+    cells: list of int (required)
+        Flat board (see flatten)
+    color: int (required)
+        Color being played
+    selection: iterable of int (required)
+        Indices of the marbles defining the range
+    d: int (required)
+        Index in DIRECTIONS
+    Returns
+    -------
+    Move if the move is valid
+    None otherwise
+    """
+    checked = line_axis(selection)
+    if checked is None:
+        return None
+    line, axis = checked
+    # Moving along the range's axis is an inline move
+    if d % 3 == axis % 3:
+        return None
+    changes = []
+    for c in line:
+        target = NEIGHBOURS[c][d]
+        if cells[c] != color or target == OFF or cells[target] != EMPTY:
+            return None
+        changes.append((c, color, EMPTY))
+        changes.append((target, EMPTY, color))
+    return Move(line, d, 0, 0, tuple(changes))
+
+def legal_moves(cells, color):
+    """
+    Generates every legal move of a given color: inline moves of 1 to 3 marbles
+    (including sumitos and ejections) and broadside moves of 2 or 3 marbles.
+    Every move is generated exactly once.
+
+    Parameters
+    ----------
+    cells: list of int (required)
+        Flat board (see flatten)
+    color: int (required)
+        Color being played
+    Yields
+    ------
+    Move:
+        Legal move
+    """
+    neighbours = NEIGHBOURS
+    for o in range(N_CELLS):
+        if cells[o] != color:
+            continue
+        # Inline moves, the marble at o being the tail of the line
+        for d in range(6):
+            move = push(cells, color, o, d)
+            if move is not None:
+                yield move
+        # Broadside moves of the ranges starting at o
+        for axis in AXES:
+            second = neighbours[o][axis]
+            if second == OFF or cells[second] != color:
+                continue
+            third = neighbours[second][axis]
+            if third != OFF and cells[third] == color:
+                lines = ((o, second), (o, second, third))
+            else:
+                lines = ((o, second),)
+            for line in lines:
+                for d in range(6):
+                    if d % 3 == axis:
+                        continue
+                    changes = []
+                    for c in line:
+                        target = neighbours[c][d]
+                        if target == OFF or cells[target] != EMPTY:
+                            break
+                        changes.append((c, color, EMPTY))
+                        changes.append((target, EMPTY, color))
+                    else:
+                        yield Move(line, d, 0, 0, tuple(changes))
+
+def apply(cells, move) -> None:
+    """Plays a move on a flat board (in place)."""
+    for c, _, new in move.changes:
+        cells[c] = new
+
+def undo(cells, move) -> None:
+    """Takes back a move played on a flat board (in place)."""
+    for c, old, _ in move.changes:
+        cells[c] = old
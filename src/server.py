@@ -0,0 +1,270 @@
+"""
+Multi-game Abalone server.
+A single asyncio process hosts any number of sessions, each owning its own
+GameState (a few hundred bytes, see state.py). Clients talk line-delimited JSON over TCP, one object per line:
+
+    {"op": "create", "layout": "STANDARD", "seed": 1}  -> joined (first seat)
+    {"op": "join", "session": "3"}                     -> joined (free seat)
+    {"op": "move", "move": "c3NE"}                     -> moved (broadcast)
+    {"op": "stats"}                                    -> stats
+
+Moves use the short notation of records.py and are checked with the rules.
+Joining sends the whole position once, every move is then broadcast as a
+diff: the cells it changed, the scores and the color to play.
+Every message from the server has an "op" field, errors being
+{"op": "error", "message": ...}.
+
+Usage:
+    python src/server.py --port 7777
+    python src/game.py --connect localhost:7777              # new session
+    python src/game.py --connect localhost:7777 --session 1  # join it
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import statistics
+from collections import deque
+from time import perf_counter
+
+import rules
+from layouts import LAYOUTS
+from records import COLOR_NAMES, notation, parse_move
+from state import GameState
+
+HOST = "localhost"
+PORT = 7777
+LATENCY_SAMPLES = 10000 # Moves kept to compute the latency statistics
+
+
+def encode(message) -> bytes:
+    """Converts a message into a line of JSON."""
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+def session_state(session) -> dict:
+    """Returns the whole position of a Session (sent once when joining)."""
+    state = session.state
+    return {
+        "cells": "".join(map(str, state.cells)),
+        "color": state.color,
+        "scores": [state.blue_score, state.yellow_score],
+        "ply": len(session.moves),
+        "layout": session.layout,
+        "first": session.first_color,
+        "moves": session.moves,
+    }
+
+
+class Session:
+    """
+    A game hosted by the server.
+
+    Parameters
+    ----------
+    session_id: str (required)
+        Identifier given to the clients
+    layout: str (required)
+        Name of the starting configuration (see layouts.py)
+    first_color: int (required)
+        Color playing the first move
+
+    Attributes
+    ----------
+    state: GameState
+        Position of the game
+    moves: list of str
+        Moves played, in short notation
+    seats: dict
+        keys: int (color), values: asyncio.StreamWriter of the player
+    """
+
+    __slots__ = ("session_id", "layout", "first_color", "state", "moves", "seats")
+
+    def __init__(self, session_id, layout, first_color):
+        self.session_id = session_id
+        self.layout = layout
+        self.first_color = first_color
+        self.state = GameState.from_layout(layout, first_color)
+        self.moves = []
+        self.seats = {}
+
+    def free_color(self):
+        """Returns the color of a free seat, None if both are taken."""
+        for color in (rules.BLUE, rules.YELLOW):
+            if color not in self.seats:
+                return color
+        return None
+
+    async def broadcast(self, message) -> None:
+        """Sends a message to every player of the session."""
+        line = encode(message)
+        writers = list(self.seats.values())
+        for writer in writers:
+            writer.write(line)
+        await asyncio.gather(*(writer.drain() for writer in writers), return_exceptions=True)
+
+
+class Server:
+    """
+    Hosts the sessions and handles the clients' connections.
+
+    Attributes
+    ----------
+    sessions: dict
+        keys: str (session identifier), values: Session
+    latencies: deque
+        Time (seconds) between receiving a move and broadcasting it, last moves only
+    """
+
+    ######### Constructor #########
+    def __init__(self):
+        self.sessions = {}
+        self.ids = itertools.count(1)
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.moves = 0
+
+    ######### Methods #########
+    async def handle(self, reader, writer) -> None:
+        """Serves a client until it disconnects (one task per connection)."""
+        session, color = None, None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                start = perf_counter()
+                try:
+                    message = json.loads(line)
+                    op = message.get("op")
+                    if op == "create" and session is None:
+                        session, color = self.create(message, writer)
+                        await self.joined(session, color, writer)
+                    elif op == "join" and session is None:
+                        session, color = self.join(message, writer)
+                        await self.joined(session, color, writer)
+                    elif op == "move" and session is not None:
+                        await self.move(session, color, message, start)
+                    elif op == "stats":
+                        writer.write(encode(self.stats()))
+                    else:
+                        raise ValueError(f"Unexpected request: {op}")
+                except (ValueError, KeyError, TypeError, AttributeError) as error:
+                    writer.write(encode({"op": "error", "message": str(error)}))
+                await writer.drain()
+        except (ConnectionError, ValueError): # Disconnected or line too long
+            pass
+        finally:
+            if session is not None:
+                await self.leave(session, color)
+            writer.close()
+
+    def create(self, message, writer) -> tuple:
+        """Creates a session and seats its creator."""
+        layout = message.get("layout", "STANDARD")
+        if layout not in LAYOUTS:
+            raise ValueError(f"Unknown layout: {layout}")
+        color = message.get("color", rules.BLUE)
+        if color not in COLOR_NAMES:
+            raise ValueError(f"Unknown color: {color}")
+        session_id = str(next(self.ids))
+        first_color = random.Random(message.get("seed")).choice((rules.BLUE, rules.YELLOW))
+        session = Session(session_id, layout, first_color)
+        session.seats[color] = writer
+        self.sessions[session_id] = session
+        return session, color
+
+    def join(self, message, writer) -> tuple:
+        """Seats a client in an existing session."""
+        session = self.sessions.get(str(message.get("session")))
+        if session is None:
+            raise ValueError(f"Unknown session: {message.get('session')}")
+        color = session.free_color()
+        if color is None:
+            raise ValueError(f"Session {session.session_id} is full")
+        session.seats[color] = writer
+        return session, color
+
+    async def joined(self, session, color, writer) -> None:
+        """Sends the whole position to a new player and tells the others."""
+        writer.write(encode({
+            "op": "joined", "session": session.session_id, "color": color,
+            "state": session_state(session),
+        }))
+        others = [w for c, w in session.seats.items() if c != color]
+        for other in others:
+            other.write(encode({"op": "opponent", "color": color}))
+        await asyncio.gather(*(other.drain() for other in others), return_exceptions=True)
+
+    async def move(self, session, color, message, start) -> None:
+        """Checks and plays a move, then broadcasts the change to the session."""
+        state = session.state
+        if state.check_win():
+            raise ValueError("The game is over")
+        if state.color != color:
+            raise ValueError("Not your turn")
+        move = parse_move(message["move"], state.cells, color)
+        state.play(move)
+        session.moves.append(notation(move))
+        await session.broadcast({
+            "op": "moved",
+            "move": session.moves[-1],
+            "changes": [[cell, new] for cell, _, new in move.changes],
+            "scores": [state.blue_score, state.yellow_score],
+            "color": state.color,
+            "ply": len(session.moves),
+            "winner": state.check_win(),
+        })
+        self.moves += 1
+        self.latencies.append(perf_counter() - start)
+
+    async def leave(self, session, color) -> None:
+        """Frees a seat, closing the session when it is empty."""
+        if session.seats.get(color) is None:
+            return
+        del session.seats[color]
+        if not session.seats:
+            del self.sessions[session.session_id]
+        else:
+            await session.broadcast({"op": "left", "color": color})
+
+    def stats(self) -> dict:
+        """Returns the number of sessions and the move latencies (milliseconds)."""
+        latencies = sorted(self.latencies)
+        stats = {
+            "op": "stats",
+            "sessions": len(self.sessions),
+            "active": sum(len(s.seats) == 2 for s in self.sessions.values()),
+            "moves": self.moves,
+        }
+        if latencies:
+            stats["latency_ms"] = {
+                "mean": statistics.fmean(latencies) * 1000,
+                "p50": latencies[len(latencies) // 2] * 1000,
+                "p99": latencies[int(len(latencies) * 0.99)] * 1000,
+                "max": latencies[-1] * 1000,
+            }
+        return stats
+
+
+async def serve(host=HOST, port=PORT) -> None:
+    """Runs a server until cancelled."""
+    server = Server()
+    tcp_server = await asyncio.start_server(server.handle, host, port, limit=2**16)
+    print(f"Serving Abalone on {host}:{port}")
+    async with tcp_server:
+        await tcp_server.serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser(description="Abalone game server")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Lightweight game state, for processes holding many positions at once
+(server sessions, analysis).
+A GameState only keeps the 61 cells (one byte each), the color to play and
+both scores, whereas a Board also carries the display data: pixel-keyed
+deadzones, drawing buffers, history and caches.
+
+Run this file to measure the memory used per game:
+    python src/state.py
+"""
+
+import tracemalloc
+
+import rules
+from bitboard import Bitboard
+from layouts import LAYOUTS
+
+
+class GameState:
+    """
+    Position of a game: cells, color to play and scores.
+
+    Parameters
+    ----------
+    cells: iterable of int (required)
+        Flat board (see rules.flatten)
+    color: int (optional, default=2)
+        Color to play
+    blue_score: int (optional, default=0)
+        Number of yellow marbles ejected by blue
+    yellow_score: int (optional, default=0)
+        Number of blue marbles ejected by yellow
+    """
+
+    __slots__ = ("cells", "color", "blue_score", "yellow_score")
+
+    ######### Constructor #########
+    def __init__(self, cells, color=rules.BLUE, blue_score=0, yellow_score=0):
+        self.cells = bytearray(cells)
+        self.color = color
+        self.blue_score = blue_score
+        self.yellow_score = yellow_score
+
+    ######### Methods #########
+    @classmethod
+    def from_layout(cls, name, color=rules.BLUE):
+        """Creates the starting position of a layout (see layouts.py)."""
+        return cls(rules.flatten(LAYOUTS[name]), color)
+
+    @classmethod
+    def from_board(cls, board):
+        """Extracts the position of a Board."""
+        return cls(
+            rules.flatten(board.data), board.current_color,
+            board.scores["Blue"], board.scores["Yellow"])
+
+    def to_board(self, board) -> None:
+        """Sets a Board (display) to this position, refilling its deadzones."""
+        board.load_bitboard(self.to_bitboard())
+
+    def to_bitboard(self) -> Bitboard:
+        """Returns the position as a Bitboard (search engines)."""
+        return Bitboard.from_cells(self.cells, self.color, self.blue_score, self.yellow_score)
+
+    def copy(self):
+        """Returns an independent copy of the position."""
+        return GameState(self.cells, self.color, self.blue_score, self.yellow_score)
+
+    def check_win(self):
+        """Returns the winning color (see Board.check_win), False if none."""
+        if self.blue_score == 6:
+            return rules.BLUE
+        if self.yellow_score == 6:
+            return rules.YELLOW
+        return False
+
+    def legal_moves(self):
+        """Generates every legal move of the color to play (see rules.legal_moves)."""
+        return rules.legal_moves(self.cells, self.color)
+
+    def play(self, move) -> None:
+        """Plays a legal rules.Move and hands over to the enemy."""
+        rules.apply(self.cells, move)
+        if move.ejected == rules.YELLOW:
+            self.blue_score += 1
+        elif move.ejected == rules.BLUE:
+            self.yellow_score += 1
+        self.color = rules.enemy_of(self.color)
+
+    def undo(self, move) -> None:
+        """Takes back the last move played (see self.play)."""
+        self.color = rules.enemy_of(self.color)
+        if move.ejected == rules.YELLOW:
+            self.blue_score -= 1
+        elif move.ejected == rules.BLUE:
+            self.yellow_score -= 1
+        rules.undo(self.cells, move)
+
+
+def bytes_per_game(factory, n=10000) -> float:
+    """
+    Measures the memory allocated per game by creating many of them.
+
+    Parameters
+    ----------
+    factory: callable (required)
+        Returns a new game
+    n: int (optional, default=10000)
+        Number of games created
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    games = [factory() for _ in range(n)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del games
+    return (after - before) / n
+
+def main():
+    from board import Board # Only needed for the comparison
+    for name, factory in (
+            ("Board", lambda: Board(LAYOUTS["STANDARD"])),
+            ("GameState", lambda: GameState.from_layout("STANDARD")),
+            ("Bitboard", lambda: Bitboard.from_cells(rules.flatten(LAYOUTS["STANDARD"]), rules.BLUE))):
+        print(f"{name:<10} {bytes_per_game(factory):8.0f} bytes per game")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Symmetries of the board, to store positions under a canonical key.
+The hexagon has 12 symmetries (6 rotations, each with or without a
+reflection) and the colors can be swapped: a position with yellow to play
+is the same as the position with the colors swapped and blue to play.
+Up to 12 equivalent positions (24 counting the colour swap) thus share a
+single key in transposition tables, opening books or position databases.
+
+Keys are bytes: the 61 cells of the transformed board with the side to
+play as blue, then the scores of the side to play and of its enemy.
+Transforms are applied with precomputed cell permutations (itemgetter) and
+a byte translation table swapping the colors, ~20us per position.
+"""
+
+from collections import namedtuple
+from operator import itemgetter
+
+import rules
+
+# Transform applied to a position to obtain its canonical key:
+#   index: symmetry of the board (0 is the identity, see PERMUTATIONS)
+#   swap: True if the colors have been swapped (yellow was to play)
+Transform = namedtuple("Transform", ["index", "swap"])
+
+# Byte translation table swapping blue and yellow
+SWAP_COLORS = bytes.maketrans(bytes((rules.BLUE, rules.YELLOW)), bytes((rules.YELLOW, rules.BLUE)))
+
+
+def cube(q, r) -> tuple:
+    """Converts an axial coordinate into cube coordinates centred on the board."""
+    z = r - 4
+    return q, -q - z, z
+
+def symmetries() -> list:
+    """
+    Returns the 12 symmetries of the hexagon as functions of cube coordinates:
+    rotations by k*60 degrees, then the same rotations after a reflection.
+    """
+    def rotate(k):
+        def transform(x, y, z):
+            for _ in range(k):
+                x, y, z = -z, -x, -y
+            return x, y, z
+        return transform
+
+    def reflect(rotation):
+        return lambda x, y, z: rotation(x, z, y)
+
+    rotations = [rotate(k) for k in range(6)]
+    return rotations + [reflect(rotation) for rotation in rotations]
+
+def build_tables() -> tuple:
+    """
+    Computes where every cell and direction goes under every symmetry.
+
+    Returns
+    -------
+    tuple:
+        (cell maps, direction maps), CELL_MAPS[t][cell] being the image of cell
+    """
+    cell_maps, direction_maps = [], []
+    for transform in symmetries():
+        cells = []
+        for q, r in rules.AXIAL:
+            x, _, z = transform(*cube(q, r))
+            cells.append(rules.AXIAL_INDEX[x, z + 4])
+        cell_maps.append(tuple(cells))
+        directions = []
+        for dq, dr in rules.DIRECTIONS:
+            x, _, z = transform(dq, -dq - dr, dr)
+            directions.append(rules.DIRECTIONS.index((x, z)))
+        direction_maps.append(tuple(directions))
+    return tuple(cell_maps), tuple(direction_maps)
+
+CELL_MAPS, DIRECTION_MAPS = build_tables()
+N_SYMMETRIES = len(CELL_MAPS)
+# PERMUTATIONS[t] gathers the transformed board: new_cells[i] = cells[PERMUTATIONS[t][i]]
+PERMUTATIONS = tuple(
+    itemgetter(*(cell_map.index(i) for i in range(rules.N_CELLS))) for cell_map in CELL_MAPS
+)
+# INVERSES[t] undoes the symmetry t
+INVERSES = tuple(
+    next(u for u in range(N_SYMMETRIES)
+         if all(CELL_MAPS[u][CELL_MAPS[t][i]] == i for i in range(rules.N_CELLS)))
+    for t in range(N_SYMMETRIES)
+)
+
+
+def canonical(cells, color, blue_score=0, yellow_score=0) -> tuple:
+    """
+    Returns the canonical key of a position and the transform leading to it.
+    Equivalent positions (symmetric boards, swapped colors) share the same key.
+
+    Parameters
+    ----------
+    cells: bytes, bytearray or list of int (required)
+        Flat board (see rules.flatten)
+    color: int (required)
+        Color to play
+    blue_score: int (optional, default=0)
+        Number of yellow marbles ejected by blue
+    yellow_score: int (optional, default=0)
+        Number of blue marbles ejected by yellow
+    Returns
+    -------
+    tuple:
+        (key: bytes, Transform)
+    """
+    cells = bytes(cells)
+    swap = color == rules.YELLOW
+    if swap:
+        cells = cells.translate(SWAP_COLORS)
+        scores = bytes((yellow_score, blue_score))
+    else:
+        scores = bytes((blue_score, yellow_score))
+    # Comparing the permuted tuples, only the smallest one is converted to bytes
+    best, best_index = None, 0
+    for index, permutation in enumerate(PERMUTATIONS):
+        board = permutation(cells)
+        if best is None or board < best:
+            best, best_index = board, index
+    return bytes(best) + scores, Transform(best_index, swap)
+
+def canonical_key(position) -> bytes:
+    """Returns the canonical key of a GameState or a Bitboard."""
+    cells = getattr(position, "cells", None)
+    if cells is None:
+        cells = position.to_cells()
+    return canonical(cells, position.color, position.blue_score, position.yellow_score)[0]
+
+def transform_cell(cell, index) -> int:
+    """Returns the image of a cell under the symmetry index."""
+    return CELL_MAPS[index][cell]
+
+def transform_direction(d, index) -> int:
+    """Returns the image of a direction (see rules.DIRECTIONS) under the symmetry index."""
+    return DIRECTION_MAPS[index][d]
+
+def transform_move(marbles, d, index) -> tuple:
+    """
+    Maps a move, given by its marbles and direction, under the symmetry index.
+    Use INVERSES[index] to map a move stored for a canonical key back to the
+    actual board.
+
+    Returns
+    -------
+    tuple:
+        (tuple of cells, direction)
+    """
+    cell_map = CELL_MAPS[index]
+    return tuple(cell_map[c] for c in marbles), DIRECTION_MAPS[index][d]
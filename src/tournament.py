@@ -0,0 +1,195 @@
+"""
+Headless self-play tournament between two computer players.
+Games are spread over a process pool and are reproducible: every game gets
+its own seed (first player, random players, MCTS playouts), derived from
+the tournament's seed. Searches limited by time are the only source of
+non-determinism, use depth or playout limits for bit-exact replays.
+
+Usage:
+    python src/tournament.py --games 20 --player1 alphabeta:depth=2 \\
+        --player2 mcts:playouts=200 --layout BELGIAN_DAISY --seed 1
+
+Player specifications are "kind:option=value,option=value" with kind among:
+    alphabeta (options of engine.Engine: time_limit, max_depth, also time and depth)
+    mcts (options of mcts.MCTSPlayer: playouts, time_limit, max_plies, ...)
+    random (no options)
+"""
+
+import argparse
+import math
+import random
+from concurrent.futures import ProcessPoolExecutor
+from os import cpu_count
+from time import perf_counter
+
+import rules
+from bitboard import Bitboard
+from engine import Engine
+from layouts import LAYOUTS
+from mcts import MCTSPlayer
+
+# Short aliases of the players' options
+ALIASES = {"time": "time_limit", "depth": "max_depth"}
+
+
+class RandomPlayer:
+    """A player choosing its moves at random (ejections first)."""
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+
+    def search(self, position):
+        """Returns a random legal bitboard move, None if there is none."""
+        moves = position.legal_moves()
+        ejections = [m for m in moves if m[2]]
+        return self.rng.choice(ejections or moves) if moves else None
+
+
+def parse_spec(spec) -> tuple:
+    """
+    Parses a player specification such as "alphabeta:depth=3,time=1.5".
+
+    Returns
+    -------
+    tuple:
+        (kind, dict of options)
+    """
+    kind, _, options = spec.partition(":")
+    if kind not in ("alphabeta", "mcts", "random"):
+        raise ValueError(f"Unknown player: {kind}")
+    parsed = {}
+    for option in filter(None, options.split(",")):
+        name, _, value = option.partition("=")
+        name = ALIASES.get(name, name)
+        try:
+            parsed[name] = int(value)
+        except ValueError:
+            parsed[name] = float(value)
+    return kind, parsed
+
+def make_player(spec, seed):
+    """Creates a player with a search(position) method from its specification."""
+    kind, options = parse_spec(spec)
+    if kind == "alphabeta":
+        if "max_depth" in options and "time_limit" not in options:
+            options["time_limit"] = math.inf
+        return Engine(**options)
+    if kind == "mcts":
+        options.setdefault("workers", 1) # Games already run in parallel
+        return MCTSPlayer(seed=seed, **options)
+    return RandomPlayer(seed)
+
+def play_game(spec1, spec2, layout, seed, max_plies, player1_color) -> dict:
+    """
+    Plays a single game (executed by the worker processes).
+
+    Parameters
+    ----------
+    spec1, spec2: str (required)
+        Specifications of both players
+    layout: str (required)
+        Name of the starting configuration (see layouts.py)
+    seed: int (required)
+        Seed of the game
+    max_plies: int (required)
+        Length after which the game is a draw
+    player1_color: int (required)
+        Color played by the first player
+    Returns
+    -------
+    dict:
+        winner (1 or 2 for the players, 0 for a draw), plies and search time
+    """
+    rng = random.Random(seed)
+    position = Bitboard.from_cells(rules.flatten(LAYOUTS[layout]), rng.choice((2, 3)))
+    player2_color = rules.enemy_of(player1_color)
+    players = {
+        player1_color: make_player(spec1, rng.getrandbits(32)),
+        player2_color: make_player(spec2, rng.getrandbits(32)),
+    }
+    plies, search_time = 0, 0.0
+    while not position.check_win() and plies < max_plies:
+        start = perf_counter()
+        move = players[position.color].search(position)
+        search_time += perf_counter() - start
+        if move is None:
+            break
+        position.make(move)
+        plies += 1
+    for player in players.values():
+        if isinstance(player, MCTSPlayer):
+            player.close()
+    winner = position.check_win()
+    return {
+        "winner": 0 if not winner else 1 if winner == player1_color else 2,
+        "plies": plies,
+        "time": search_time,
+    }
+
+def elo(wins, losses, draws) -> tuple:
+    """
+    Estimates the Elo difference of the first player with a 95% confidence interval.
+
+    Returns
+    -------
+    tuple:
+        (difference, lower bound, upper bound)
+    """
+    n = wins + losses + draws
+    score = (wins + 0.5 * draws) / n
+    deviation = math.sqrt(max(score * (1 - score), 0.0) / n)
+
+    def to_elo(p):
+        p = min(max(p, 1e-6), 1 - 1e-6)
+        return 400 * math.log10(p / (1 - p))
+
+    return to_elo(score), to_elo(score - 1.96 * deviation), to_elo(score + 1.96 * deviation)
+
+def run(spec1, spec2, games, layout="STANDARD", seed=0, max_plies=300, workers=None):
+    """
+    Plays a tournament and returns the results of every game.
+    The first player plays blue during even games and yellow during odd ones.
+    """
+    rng = random.Random(seed)
+    tasks = [
+        (spec1, spec2, layout, rng.getrandbits(32), max_plies, 2 if i % 2 == 0 else 3)
+        for i in range(games)
+    ]
+    with ProcessPoolExecutor(workers or cpu_count() or 1) as pool:
+        return list(pool.map(play_game, *zip(*tasks)))
+
+def report(results, elapsed) -> str:
+    """Summarizes the results of a tournament."""
+    wins = sum(r["winner"] == 1 for r in results)
+    losses = sum(r["winner"] == 2 for r in results)
+    draws = len(results) - wins - losses
+    diff, low, high = elo(wins, losses, draws)
+    plies = sum(r["plies"] for r in results)
+    search_time = sum(r["time"] for r in results)
+    return "\n".join([
+        f"Games: {len(results)} in {elapsed:.1f}s",
+        f"Player 1: {wins} wins, {losses} losses, {draws} draws",
+        f"Elo difference: {diff:+.0f} (95% CI: {low:+.0f} to {high:+.0f})",
+        f"Average game length: {plies / len(results):.1f} plies",
+        f"Moves per second: {plies / search_time if search_time else 0:.1f}",
+    ])
+
+def main():
+    parser = argparse.ArgumentParser(description="Abalone self-play tournament")
+    parser.add_argument("--player1", default="alphabeta:depth=2")
+    parser.add_argument("--player2", default="random")
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--layout", choices=sorted(LAYOUTS), default="STANDARD")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--max-plies", type=int, default=300, help="length after which a game is a draw")
+    parser.add_argument("--workers", type=int, default=None, help="number of processes")
+    args = parser.parse_args()
+    start = perf_counter()
+    results = run(
+        args.player1, args.player2, args.games, args.layout, args.seed,
+        args.max_plies, args.workers)
+    print(report(results, perf_counter() - start))
+
+if __name__ == "__main__":
+    main()
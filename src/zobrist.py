@@ -0,0 +1,153 @@
+"""
+Zobrist hashing of Abalone positions and bounded transposition table.
+A position's hash is the XOR of one random 64-bit key per (cell, color),
+one key for yellow to play and one key per score value of each player.
+The keys are drawn from a fixed seed so that every process (and every
+saved file) agrees on the hash of a given position.
+"""
+
+import random
+from array import array
+
+SEED = 0xABA1013
+
+_rng = random.Random(SEED)
+# Keys of the cells, indexed by the single-bit masks of bitboard.BIT
+N_BITS = 121
+BLUE_KEYS = tuple(_rng.getrandbits(64) for _ in range(N_BITS))
+YELLOW_KEYS = tuple(_rng.getrandbits(64) for _ in range(N_BITS))
+YELLOW_TO_PLAY = _rng.getrandbits(64)
+# Keys of the scores (number of marbles ejected, from 0 to 6)
+BLUE_SCORE_KEYS = tuple(_rng.getrandbits(64) for _ in range(7))
+YELLOW_SCORE_KEYS = tuple(_rng.getrandbits(64) for _ in range(7))
+BLUE_KEY = {1 << i: key for i, key in enumerate(BLUE_KEYS)}
+YELLOW_KEY = {1 << i: key for i, key in enumerate(YELLOW_KEYS)}
+
+
+def hash_mask(mask, keys) -> int:
+    """
+    XORs the keys of every bit set in a mask.
+
+    Parameters
+    ----------
+    mask: int (required)
+        Bitmask (see bitboard.py)
+    keys: dict (required)
+        Key of every single-bit mask (BLUE_KEY or YELLOW_KEY)
+    """
+    h = 0
+    while mask:
+        bit = mask & -mask
+        h ^= keys[bit]
+        mask ^= bit
+    return h
+
+def hash_position(blue, yellow, color, blue_score, yellow_score) -> int:
+    """Computes the Zobrist hash of a position from scratch."""
+    h = hash_mask(blue, BLUE_KEY) ^ hash_mask(yellow, YELLOW_KEY)
+    h ^= BLUE_SCORE_KEYS[blue_score] ^ YELLOW_SCORE_KEYS[yellow_score]
+    if color == 3:
+        h ^= YELLOW_TO_PLAY
+    return h
+
+
+class TranspositionTable:
+    """
+    A fixed-size table storing search results keyed by Zobrist hashes.
+    Each hash maps to a single slot (hash modulo the number of slots).
+    A slot is overwritten when it is empty, holds the same position, was written
+    during an older search or was searched less deeply than the new result.
+
+    Parameter
+    ---------
+    max_bytes: int (optional, default=64 MiB)
+        Memory cap of the table. The number of slots is derived from it.
+    Attributes
+    ----------
+    size: int
+        Number of slots
+    age: int
+        Current search generation, incremented by self.new_search()
+    """
+
+    # Bound types of a stored value
+    EXACT, LOWER, UPPER = 0, 1, 2
+    # Estimated memory used by a slot: key, depth, bound, age and value arrays,
+    # plus the list pointer and tuple of the best move.
+    ENTRY_BYTES = 8 + 1 + 1 + 2 + 4 + 8 + 96
+
+    ######### Constructor #########
+    def __init__(self, max_bytes=64 * 2**20):
+        self.size = max(1, max_bytes // self.ENTRY_BYTES)
+        self.age = 0
+        self.hits = 0
+        self.probes = 0
+        self.clear()
+
+    ######### Methods #########
+    def clear(self) -> None:
+        """Empties the table."""
+        size = self.size
+        self.keys = array("Q", bytes(8 * size))
+        self.depths = array("b", bytes(size))
+        self.bounds = array("b", bytes(size))
+        self.ages = array("H", bytes(2 * size))
+        self.values = array("i", bytes(4 * size))
+        self.moves = [None] * size
+
+    def new_search(self) -> None:
+        """Starts a new search generation: older entries become replaceable."""
+        self.age = (self.age + 1) & 0xFFFF
+
+    def probe(self, key):
+        """
+        Looks up a position.
+
+        Parameter
+        ---------
+        key: int (required)
+            Zobrist hash of the position
+        Returns
+        -------
+        tuple if the position is stored
+            (depth, bound, value, best move)
+        None otherwise
+        """
+        self.probes += 1
+        i = key % self.size
+        if self.keys[i] != key or self.moves[i] is None:
+            return None
+        self.hits += 1
+        return self.depths[i], self.bounds[i], self.values[i], self.moves[i]
+
+    def store(self, key, depth, bound, value, move) -> None:
+        """
+        Stores a search result according to the replacement policy.
+
+        Parameters
+        ----------
+        key: int (required)
+            Zobrist hash of the position
+        depth: int (required)
+            Remaining depth the position was searched with
+        bound: int (required)
+            EXACT, LOWER or UPPER
+        value: int (required)
+            Score of the position
+        move: tuple (required)
+            Best move found
+        """
+        i = key % self.size
+        if (self.moves[i] is not None and self.keys[i] != key
+                and self.ages[i] == self.age and self.depths[i] > depth):
+            return
+        self.keys[i] = key
+        self.depths[i] = depth
+        self.bounds[i] = bound
+        self.ages[i] = self.age
+        self.values[i] = value
+        self.moves[i] = move
+
+    def usage(self) -> float:
+        """Returns the fraction of slots in use."""
+        return sum(move is not None for move in self.moves) / self.size